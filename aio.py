@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+import asyncio
+from inspect import isawaitable
+from computer import Computer, Status, no_input
+
+
+class AsyncComputer(object):
+    Slice = 1 << 16
+
+    def __init__(self, op_codes, input_device, output_device,
+                 computer=Computer, **options):
+        self._input = input_device
+        self._output = output_device
+        self._pending = []
+        self._computer = computer(op_codes, no_input, self._pending.append,
+                                  **options)
+
+    def computer(self):
+        return self._computer
+
+    def queue_input(self, value):
+        self._computer.queue_input(value)
+
+    async def _flush(self):
+        pending = self._pending
+        for value in pending:
+            result = self._output(value)
+            if isawaitable(result):
+                await result
+        pending.clear()
+
+    async def _read(self):
+        value = self._input()
+        if isawaitable(value):
+            value = await value
+        if type(value) is not int:
+            value = int(value, 10)
+        self._computer.queue_input(value)
+
+    async def run(self):
+        computer = self._computer
+        while True:
+            status = computer.run(max_steps=AsyncComputer.Slice)
+            if self._pending:
+                await self._flush()
+            if status is Status.HALTED:
+                return status
+            if status is Status.BLOCKED:
+                await self._read()
+            else:
+                await asyncio.sleep(0)
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+
+import sys
+from computer import JumpOps, OpCode, ParamMode, decode, parse_program
+
+
+Mnemonics = {
+    OpCode.ADD: 'add',
+    OpCode.MULTIPLY: 'mul',
+    OpCode.INPUT: 'in',
+    OpCode.OUTPUT: 'out',
+    OpCode.JMP_IF_TRUE: 'jt',
+    OpCode.JMP_IF_FALSE: 'jf',
+    OpCode.LESS_THAN: 'lt',
+    OpCode.EQUALS: 'eq',
+    OpCode.OFFSET: 'arb',
+    OpCode.HALT: 'hlt',
+}
+
+
+StoreOps = frozenset({OpCode.ADD, OpCode.MULTIPLY})
+
+
+class Operation(object):
+    __slots__ = ('index', 'op_code', 'modes', 'params')
+
+    def __init__(self, index, op_code, modes, params):
+        self.index = index
+        self.op_code = op_code
+        self.modes = modes
+        self.params = params
+
+    def size(self):
+        return len(self.params) + 1
+
+    def next(self):
+        return self.index + self.size()
+
+    def target(self):
+        if self.op_code in JumpOps and self.modes[1] is ParamMode.IMMEDIATE:
+            return self.params[1]
+        return None
+
+    def always(self):
+        if self.op_code not in JumpOps:
+            return False
+        if self.modes[0] is not ParamMode.IMMEDIATE:
+            return False
+        return bool(self.params[0]) == (self.op_code is OpCode.JMP_IF_TRUE)
+
+    def never(self):
+        if self.op_code not in JumpOps:
+            return False
+        if self.modes[0] is not ParamMode.IMMEDIATE:
+            return False
+        return bool(self.params[0]) != (self.op_code is OpCode.JMP_IF_TRUE)
+
+    def returns(self):
+        return self.always() and self.modes[1] is ParamMode.RELATIVE
+
+    def format(self):
+        params = []
+        for mode, value in zip(self.modes, self.params):
+            if mode is ParamMode.IMMEDIATE:
+                params.append(str(value))
+            elif mode is ParamMode.RELATIVE:
+                params.append(f"[rb{value:+}]")
+            else:
+                params.append(f"[{value}]")
+        return f"{Mnemonics[self.op_code]:<4}{', '.join(params)}".rstrip()
+
+
+class Block(object):
+    def __init__(self, start):
+        self.start = start
+        self.operations = []
+        self.successors = []
+
+    def end(self):
+        return self.operations[-1].next() if self.operations else self.start
+
+
+class Analysis(object):
+    def __init__(self, program, entry=0):
+        self._program = program
+        self._entry = entry
+        self._operations = {}
+        self._leaders = {entry}
+        self._functions = set()
+        self._calls = []
+        self._returns = []
+        self._indirect = []
+        self._tables = {}
+        self._targets = {}
+        self._blocks = {}
+        self._walk()
+        self._split()
+
+    def _decode(self, index):
+        program = self._program
+        if index < 0 or index >= len(program):
+            return None
+        try:
+            op_code, modes = decode(program[index])
+        except ValueError:
+            return None
+        if index + len(modes) >= len(program):
+            return None
+        params = program[index + 1:index + 1 + len(modes)]
+        return Operation(index, op_code, modes, params)
+
+    def _call(self, operation, previous):
+        if previous is None or previous.op_code not in StoreOps:
+            return False
+        if (previous.modes[0] is not ParamMode.IMMEDIATE or
+                previous.modes[1] is not ParamMode.IMMEDIATE or
+                previous.modes[2] is not ParamMode.RELATIVE):
+            return False
+        lhs, rhs, _ = previous.params
+        value = lhs + rhs if previous.op_code is OpCode.ADD else lhs * rhs
+        return value == operation.next()
+
+    def _indirect_targets(self, operation, stores):
+        if operation.modes[1] is not ParamMode.POSITION:
+            return []
+        table = self._table(operation, stores.get(operation.index + 2))
+        if table is not None:
+            return table
+        address = operation.params[1]
+        if 0 <= address < len(self._program):
+            return [self._program[address]]
+        return []
+
+    def _table(self, operation, store):
+        if store is None or store.op_code is not OpCode.ADD:
+            return None
+        if store.modes[0] is ParamMode.IMMEDIATE:
+            base = store.params[0]
+        elif store.modes[1] is ParamMode.IMMEDIATE:
+            base = store.params[1]
+        else:
+            return None
+
+        program = self._program
+        targets = []
+        index = base
+        while 0 <= index < len(program) and index not in self._operations:
+            target = program[index]
+            if self._decode(target) is None:
+                break
+            targets.append(target)
+            index += 1
+        if not targets:
+            return None
+        self._tables[operation.index] = (base, index)
+        return targets
+
+    def _walk(self):
+        pending = [(self._entry, None)]
+        while pending:
+            index, previous = pending.pop()
+            stores = {}
+            while index not in self._operations:
+                operation = self._decode(index)
+                if operation is None:
+                    break
+                self._operations[index] = operation
+                op_code = operation.op_code
+
+                if op_code is OpCode.HALT:
+                    break
+
+                if op_code in JumpOps:
+                    target = operation.target()
+                    if target is not None and not operation.never():
+                        self._leaders.add(target)
+                        pending.append((target, None))
+                        if self._call(operation, previous):
+                            self._functions.add(target)
+                            self._calls.append(
+                                (operation.index, target, operation.next()))
+                            self._leaders.add(operation.next())
+                            pending.append((operation.next(), None))
+                    elif operation.returns():
+                        self._returns.append(operation.index)
+                    elif target is None:
+                        self._indirect.append(operation.index)
+                        if not operation.never():
+                            targets = self._indirect_targets(operation,
+                                                             stores)
+                            self._targets[operation.index] = targets
+                            self._leaders.update(targets)
+                            pending.extend((t, None) for t in targets)
+
+                    self._leaders.add(operation.next())
+                    if operation.always():
+                        break
+                    stores = {}
+                elif (op_code in StoreOps and
+                        operation.modes[2] is ParamMode.POSITION):
+                    stores[operation.params[2]] = operation
+
+                previous = operation
+                index = operation.next()
+
+    def _split(self):
+        block = None
+        for index in sorted(self._operations):
+            operation = self._operations[index]
+            if block is None or index in self._leaders or index != block.end():
+                block = Block(index)
+                self._blocks[index] = block
+            block.operations.append(operation)
+
+        for block in self._blocks.values():
+            last = block.operations[-1]
+            if last.op_code is OpCode.HALT:
+                continue
+            if last.op_code in JumpOps:
+                target = last.target()
+                if target is not None and not last.never():
+                    block.successors.append(target)
+                block.successors.extend(self._targets.get(last.index, ()))
+                if not last.always():
+                    block.successors.append(last.next())
+            else:
+                block.successors.append(last.next())
+            block.successors = [successor for successor in block.successors
+                                if successor in self._blocks]
+
+    def operations(self):
+        return [self._operations[index] for index in sorted(self._operations)]
+
+    def blocks(self):
+        return [self._blocks[index] for index in sorted(self._blocks)]
+
+    def edges(self):
+        return [(block.start, successor)
+                for block in self.blocks() for successor in block.successors]
+
+    def functions(self):
+        return sorted(self._functions)
+
+    def calls(self):
+        return list(self._calls)
+
+    def returns(self):
+        return sorted(self._returns)
+
+    def indirect(self):
+        return sorted(self._indirect)
+
+    def tables(self):
+        return dict(self._tables)
+
+    def code(self):
+        cells = bytearray(len(self._program))
+        for operation in self._operations.values():
+            cells[operation.index:operation.next()] = (
+                b'\x01' * operation.size())
+        for start, end in self._tables.values():
+            cells[start:end] = bytes(end - start)
+        return cells
+
+    def code_ranges(self):
+        return self._ranges(1)
+
+    def data_ranges(self):
+        return self._ranges(0)
+
+    def _ranges(self, kind):
+        ranges = []
+        start = None
+        for index, value in enumerate(self.code()):
+            if value == kind and start is None:
+                start = index
+            elif value != kind and start is not None:
+                ranges.append((start, index))
+                start = None
+        if start is not None:
+            ranges.append((start, len(self._program)))
+        return ranges
+
+    def disassembly(self):
+        rows = []
+        functions = self._functions
+        for block in self.blocks():
+            if block.start in functions:
+                rows.append(f"\nfn_{block.start}:")
+            rows.append(f"  block_{block.start}:")
+            for operation in block.operations:
+                rows.append(f"    {operation.index:>6}  {operation.format()}")
+            if block.successors:
+                successors = ', '.join(f"block_{successor}"
+                                       for successor in block.successors)
+                rows.append(f"            -> {successors}")
+        return '\n'.join(rows)
+
+    def summary(self):
+        code = sum(end - start for start, end in self.code_ranges())
+        rows = []
+        rows.append(f"Cells: {len(self._program)}")
+        rows.append(f"Code cells: {code}")
+        rows.append(f"Data cells: {len(self._program) - code}")
+        rows.append(f"Instructions: {len(self._operations)}")
+        rows.append(f"Blocks: {len(self._blocks)}")
+        rows.append(f"Functions: {len(self._functions)}")
+        rows.append(f"Calls: {len(self._calls)}")
+        rows.append(f"Returns: {len(self._returns)}")
+        rows.append(f"Indirect jumps: {len(self._indirect)}")
+        rows.append(f"Jump tables: {len(self._tables)}")
+        rows.append("Data ranges: " + ', '.join(
+            f"{start}-{end - 1}" for start, end in self.data_ranges()))
+        return '\n'.join(rows)
+
+
+def analyze(program, entry=0):
+    return Analysis(program, entry)
+
+
+def main(file):
+    analysis = analyze(parse_program(file))
+    print(analysis.disassembly())
+    print()
+    print(analysis.summary())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        print(f"usage: {sys.argv[0]} [filename]")
+        print(f"")
+        exit(1)
+
+    input_file = sys.stdin
+
+    if (len(sys.argv) == 2):
+        try:
+            filename = sys.argv[1]
+            input_file = open(filename)
+        except FileNotFoundError as e:
+            print(e)
+            exit(1)
+
+    with input_file:
+        main(input_file)
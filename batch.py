@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from computer import Computer, OpCode, ParamCount, Status, decode
+
+
+TargetParam = {
+    OpCode.ADD: 2,
+    OpCode.MULTIPLY: 2,
+    OpCode.INPUT: 0,
+    OpCode.LESS_THAN: 2,
+    OpCode.EQUALS: 2,
+}
+
+
+class BatchComputer(object):
+    MaxWidth = 1 << 16
+
+    def __init__(self, op_codes, lanes, inputs=None, instruction_set=None):
+        width = max(len(op_codes) * 2, 64)
+        self._lanes = lanes
+        self._memory = np.zeros((lanes, width), dtype=np.int64)
+        self._memory[:, :len(op_codes)] = np.array(op_codes, dtype=np.int64)
+        self._index = np.zeros(lanes, dtype=np.int64)
+        self._offset = np.zeros(lanes, dtype=np.int64)
+        self._counter = np.zeros(lanes, dtype=np.int64)
+        self._running = np.ones(lanes, dtype=bool)
+        self._status = [None] * lanes
+        self._errors = {}
+        self._spilled = {}
+        self._spilled_outputs = {}
+        self._instruction_set = instruction_set
+
+        inputs = inputs or [[] for _ in range(lanes)]
+        depth = max([len(values) for values in inputs] + [1])
+        self._inputs = np.zeros((lanes, depth), dtype=np.int64)
+        self._input_count = np.zeros(lanes, dtype=np.int64)
+        self._input_index = np.zeros(lanes, dtype=np.int64)
+        for lane, values in enumerate(inputs):
+            self._inputs[lane, :len(values)] = values
+            self._input_count[lane] = len(values)
+
+        self._outputs = np.zeros((lanes, 4), dtype=np.int64)
+        self._output_count = np.zeros(lanes, dtype=np.int64)
+
+    def lanes(self):
+        return self._lanes
+
+    def set(self, index, values):
+        self._reserve(index)
+        self._memory[:, index] = values
+
+    def get(self, index):
+        values = []
+        for lane in range(self._lanes):
+            if lane in self._spilled:
+                values.append(self._spilled[lane].get(index))
+            elif index < self._memory.shape[1]:
+                values.append(int(self._memory[lane, index]))
+            else:
+                values.append(0)
+        return values
+
+    def status(self, lane):
+        return self._status[lane]
+
+    def error(self, lane):
+        return self._errors.get(lane)
+
+    def failed(self, lane):
+        return lane in self._errors
+
+    def counter(self, lane):
+        if lane in self._spilled:
+            return self._spilled[lane]._counter
+        return int(self._counter[lane])
+
+    def outputs(self, lane):
+        if lane in self._spilled_outputs:
+            return self._spilled_outputs[lane][:]
+        count = self._output_count[lane]
+        return [int(value) for value in self._outputs[lane, :count]]
+
+    def _reserve(self, index):
+        width = self._memory.shape[1]
+        if index < width:
+            return
+        width = max(index + 1, width * 2)
+        memory = np.zeros((self._lanes, width), dtype=np.int64)
+        memory[:, :self._memory.shape[1]] = self._memory
+        self._memory = memory
+
+    def _stop(self, lanes, status):
+        self._running[lanes] = False
+        for lane in map(int, lanes):
+            self._status[lane] = status
+
+    def _fail(self, lanes, error):
+        # Like Computer._tick, a failing instruction still counts.
+        self._running[lanes] = False
+        self._counter[lanes] += 1
+        for lane in map(int, lanes):
+            self._status[lane] = Status.HALTED
+            self._errors[lane] = error
+
+    def _spill(self, lanes):
+        self._running[lanes] = False
+        for lane in map(int, lanes):
+            outputs = self.outputs(lane)
+            self._spilled_outputs[lane] = outputs
+            computer = Computer(self._memory[lane].tolist(),
+                                lambda: None, outputs.append,
+                                instruction_set=self._instruction_set)
+            computer._index = int(self._index[lane])
+            computer._offset = int(self._offset[lane])
+            computer._counter = int(self._counter[lane])
+            start = self._input_index[lane]
+            for value in self._inputs[lane, start:self._input_count[lane]]:
+                computer.queue_input(int(value))
+            self._spilled[lane] = computer
+
+            try:
+                computer.run()
+            except (ValueError, IndexError) as e:
+                self._fail([lane], e)
+                continue
+            self._status[lane] = (Status.HALTED if computer.stopped()
+                                  else Status.BLOCKED)
+
+    def _modes(self, words, count):
+        modes = []
+        words = words // 100
+        for _ in range(count):
+            modes.append(words % 10)
+            words = words // 10
+        return modes
+
+    def _params(self, lanes, index, words, count, target=None):
+        modes = self._modes(words, count)
+        self._reserve(int(index.max()) + count + 1)
+        memory = self._memory
+        valid = np.ones(len(lanes), dtype=bool)
+        values = []
+        for n, mode in enumerate(modes):
+            raw = memory[lanes, index + n + 1]
+            address = np.where(mode == 2, raw + self._offset[lanes], raw)
+            if n == target:
+                valid &= address >= 0
+                values.append(np.where(valid, address, 0))
+                continue
+            immediate = mode == 1
+            address = np.where(immediate, 0, address)
+            valid &= address >= 0
+            values.append((raw, address, immediate))
+        return values, valid
+
+    def _resolve(self, lanes, valid, values):
+        addresses = [value[1] if isinstance(value, tuple) else value
+                     for value in values]
+        far = np.zeros(len(lanes), dtype=bool)
+        for address in addresses:
+            far |= address >= BatchComputer.MaxWidth
+        far &= valid
+        if far.any():
+            self._spill(lanes[far])
+        keep = valid & ~far
+        if keep.any():
+            highest = max(int(address[keep].max()) for address in addresses)
+            self._reserve(highest)
+
+        memory = self._memory
+        resolved = []
+        for value in values:
+            if isinstance(value, tuple):
+                raw, address, immediate = value
+                address = np.where(keep, address, 0)
+                resolved.append(np.where(immediate, raw,
+                                         memory[lanes, address]))
+            else:
+                resolved.append(np.where(keep, value, 0))
+        return resolved, keep
+
+    def _execute(self, code, lanes, index, words):
+        try:
+            op_code = OpCode(code)
+        except ValueError as e:
+            self._fail(lanes, e)
+            return
+
+        bad = np.zeros(len(lanes), dtype=bool)
+        for mode in self._modes(words, ParamCount[op_code]):
+            bad |= mode > 2
+        if bad.any():
+            for lane, word in zip(lanes[bad], words[bad]):
+                try:
+                    decode(int(word))
+                except ValueError as e:
+                    self._fail([lane], e)
+            lanes, index, words = lanes[~bad], index[~bad], words[~bad]
+            if not len(lanes):
+                return
+
+        if (self._instruction_set is not None and
+                op_code not in self._instruction_set):
+            self._fail(lanes, ValueError(f"{op_code} is not supported"))
+            return
+
+        if op_code is OpCode.HALT:
+            self._counter[lanes] += 1
+            self._stop(lanes, Status.HALTED)
+            return
+
+        if op_code is OpCode.INPUT:
+            waiting = self._input_index[lanes] >= self._input_count[lanes]
+            if waiting.any():
+                self._stop(lanes[waiting], Status.BLOCKED)
+                lanes, index, words = (lanes[~waiting], index[~waiting],
+                                       words[~waiting])
+                if not len(lanes):
+                    return
+
+        target = TargetParam.get(op_code)
+        count = ParamCount[op_code]
+
+        values, valid = self._params(lanes, index, words, count, target)
+        if not valid.all():
+            self._fail(lanes[~valid], IndexError('Index is negative'))
+        values, keep = self._resolve(lanes, valid, values)
+        if not keep.any():
+            return
+        lanes, index = lanes[keep], index[keep]
+        values = [value[keep] for value in values]
+
+        if op_code is OpCode.ADD or op_code is OpCode.MULTIPLY:
+            lhs, rhs, address = values
+            with np.errstate(over='ignore'):
+                if op_code is OpCode.ADD:
+                    result = lhs + rhs
+                    overflow = ((lhs ^ result) & (rhs ^ result)) < 0
+                else:
+                    result = lhs * rhs
+                    nonzero = np.where(rhs == 0, 1, rhs)
+                    overflow = ((rhs != 0) & (result // nonzero != lhs)) | (
+                        (lhs == -1) & (rhs == np.iinfo(np.int64).min))
+            if overflow.any():
+                self._spill(lanes[overflow])
+                fits = ~overflow
+                lanes, index = lanes[fits], index[fits]
+                result, address = result[fits], address[fits]
+            self._memory[lanes, address] = result
+            self._index[lanes] = index + 4
+        elif op_code is OpCode.LESS_THAN or op_code is OpCode.EQUALS:
+            lhs, rhs, address = values
+            test = lhs < rhs if op_code is OpCode.LESS_THAN else lhs == rhs
+            self._memory[lanes, address] = test.astype(np.int64)
+            self._index[lanes] = index + 4
+        elif op_code is OpCode.INPUT:
+            address, = values
+            position = self._input_index[lanes]
+            self._memory[lanes, address] = self._inputs[lanes, position]
+            self._input_index[lanes] = position + 1
+            self._index[lanes] = index + 2
+        elif op_code is OpCode.OUTPUT:
+            value, = values
+            position = self._output_count[lanes]
+            if position.max() >= self._outputs.shape[1]:
+                outputs = np.zeros((self._lanes, self._outputs.shape[1] * 2),
+                                   dtype=np.int64)
+                outputs[:, :self._outputs.shape[1]] = self._outputs
+                self._outputs = outputs
+            self._outputs[lanes, position] = value
+            self._output_count[lanes] = position + 1
+            self._index[lanes] = index + 2
+        elif op_code is OpCode.OFFSET:
+            value, = values
+            self._offset[lanes] += value
+            self._index[lanes] = index + 2
+        else:
+            test, target = values
+            if op_code is OpCode.JMP_IF_FALSE:
+                test = test == 0
+            else:
+                test = test != 0
+            self._index[lanes] = np.where(test, target, index + 3)
+
+        self._counter[lanes] += 1
+
+    def run(self):
+        while True:
+            lanes = np.flatnonzero(self._running)
+            if not len(lanes):
+                return
+            index = self._index[lanes]
+            negative = index < 0
+            if negative.any():
+                self._fail(lanes[negative], IndexError('Index is negative'))
+                lanes, index = lanes[~negative], index[~negative]
+                if not len(lanes):
+                    continue
+            self._reserve(int(index.max()))
+            words = self._memory[lanes, index]
+            codes = words % 100
+            for code in np.unique(codes):
+                selected = codes == code
+                self._execute(int(code), lanes[selected], index[selected],
+                              words[selected])
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+
+from time import perf_counter
+from computer import (Computer, JumpOps, Memory, OpCode, ParamMode, Status,
+                      decode, int_input, std_output)
+
+
+BlockOps = {
+    OpCode.ADD,
+    OpCode.MULTIPLY,
+    OpCode.JMP_IF_TRUE,
+    OpCode.JMP_IF_FALSE,
+    OpCode.LESS_THAN,
+    OpCode.EQUALS,
+    OpCode.OFFSET,
+}
+
+BinaryOps = {
+    OpCode.ADD: '{} + {}',
+    OpCode.MULTIPLY: '{} * {}',
+    OpCode.LESS_THAN: '1 if {} < {} else 0',
+    OpCode.EQUALS: '1 if {} == {} else 0',
+}
+
+
+class BlockBuilder(object):
+    MaxLength = 64
+
+    def __init__(self, computer, start, volatile):
+        self._computer = computer
+        self._start = start
+        self._volatile = volatile
+        self._dense = type(computer._memory) is Memory
+        self._watched = []
+        self._operands = []
+        self._opcodes = []
+        self._lines = []
+        self._origins = []
+        self._indent = 1
+        self._index = start
+        self._temp = 0
+        self._count = 0
+        self._limit = -1
+        self._jump = None
+
+    def _name(self):
+        self._temp += 1
+        return f"v{self._temp}"
+
+    def _load(self, address):
+        if address < 0:
+            return f"get({address})"
+        if self._dense and address < len(self._computer._memory):
+            self._limit = max(self._limit, address)
+            return f"cells[{address}]"
+        return f"get({address})"
+
+    def _operand(self, index):
+        self._operands.append(index)
+        if index not in self._volatile:
+            self._watched.append(index)
+            return self._computer.get(index), None
+        self._computer.get(index)
+        name = self._name()
+        self._emit(f"{name} = cells[{index}]" if self._dense
+                   else f"{name} = get({index})")
+        return None, name
+
+    def _read(self, mode, index, inline=True):
+        value, name = self._operand(index)
+        if mode is ParamMode.IMMEDIATE:
+            return name or repr(value)
+        if mode is ParamMode.POSITION and name is None:
+            if inline:
+                return self._load(value)
+            address = self._name()
+            self._emit(f"{address} = {self._load(value)}")
+            return address
+
+        address = self._name()
+        if mode is ParamMode.RELATIVE:
+            self._emit(f"{address} = rb + {name or value}")
+        else:
+            self._emit(f"{address} = {name}")
+        if self._dense:
+            self._emit(f"{address} = cells[{address}] "
+                       f"if 0 <= {address} < memory._size else get({address})")
+        else:
+            self._emit(f"{address} = get({address})")
+        return address
+
+    def _address(self, mode, index):
+        value, name = self._operand(index)
+        if mode is ParamMode.RELATIVE:
+            return f"rb + {name or value}"
+        return name or repr(value)
+
+    def _write(self, mode, index, expr, next_index):
+        address = self._name()
+        value = self._name()
+        self._emit(f"{address} = {self._address(mode, index)}")
+        self._emit(f"{value} = {expr}")
+        if self._dense:
+            self._emit(f"if (0 <= {address} < memory._size and "
+                       f"{address} not in watched and "
+                       f"{address} not in decoded):")
+            self._emit(f"    cells[{address}] = {value}")
+            self._emit(f"elif write({address}, {value}):")
+        else:
+            self._emit(f"if write({address}, {value}):")
+        self._emit(f"    return {next_index}, rb, {self._count}")
+
+    def _emit(self, line):
+        self._lines.append('    ' * self._indent + line)
+        self._origins.append((self._index, self._count))
+
+    def build(self):
+        index = self._start
+        end = len(self._computer._memory)
+        while self._count < BlockBuilder.MaxLength and index < end:
+            try:
+                op_code, modes = decode(self._computer.get(index))
+            except (ValueError, IndexError):
+                break
+            if op_code not in BlockOps or not self._computer.supports(op_code):
+                break
+            # Leave instructions that run off the end to the interpreter,
+            # so compiling never grows memory the program has not touched.
+            if index + len(modes) >= end:
+                break
+
+            self._count += 1
+            self._index = index
+            self._opcodes.append(index)
+            self._watched.append(index)
+            size = len(modes) + 1
+            next_index = index + size
+            params = [index + n + 1 for n in range(len(modes))]
+
+            if op_code in BinaryOps:
+                # A relative rhs is loaded on its own lines, so a position
+                # lhs must be loaded first to keep the interpreter's order.
+                lhs = self._read(modes[0], params[0],
+                                 modes[1] is not ParamMode.RELATIVE)
+                rhs = self._read(modes[1], params[1])
+                expr = BinaryOps[op_code].format(lhs, rhs)
+                self._write(modes[2], params[2], expr, next_index)
+            elif op_code is OpCode.OFFSET:
+                self._emit(f"rb += {self._read(modes[0], params[0])}")
+            else:
+                test = self._read(modes[0], params[0])
+                if op_code is OpCode.JMP_IF_FALSE:
+                    test = f"not {test}"
+                self._emit(f"if {test}:")
+                # The interpreter only reads the target when the jump is
+                # taken, so its loads belong inside the branch.
+                self._indent += 1
+                target = self._read(modes[1], params[1])
+                self._emit(f"return {target}, rb, {self._count}")
+                self._indent -= 1
+                self._jump = (index, self._count)
+
+            index = next_index
+            if op_code in JumpOps:
+                break
+
+        if not self._count:
+            return None
+
+        self._emit(f"return {index}, rb, {self._count}")
+        name = f"block_{self._start}"
+        source = '\n'.join(
+            [f"def {name}(memory, cells, rb, get, write, watched, decoded):"] +
+            self._lines)
+        namespace = {}
+        exec(compile(source, f"<intcode block {self._start}>", 'exec'),
+             namespace)
+        function = namespace[name]
+        function.origins = tuple(self._origins)
+        function.jump = self._jump
+        return function
+
+    def cells(self):
+        return self._watched
+
+    def operands(self):
+        return self._operands
+
+    def opcodes(self):
+        return self._opcodes
+
+    def limit(self):
+        return self._limit
+
+
+class CompiledBlock(object):
+    __slots__ = ('function', 'cells', 'values', 'opcodes', 'operands',
+                 'volatile', 'limit')
+
+    def __init__(self, function, cells, values, opcodes, operands, volatile,
+                 limit):
+        self.function = function
+        self.cells = cells
+        self.values = values
+        self.opcodes = opcodes
+        self.operands = operands
+        self.volatile = volatile
+        self.limit = limit
+
+    def matches(self, computer, volatile):
+        if self.limit >= len(computer._memory):
+            return False
+        get = computer.get
+        for cell, value in zip(self.cells, self.values):
+            if get(cell) != value:
+                return False
+        return self.volatile == tuple(c in volatile for c in self.operands)
+
+
+class CompiledComputer(Computer):
+    MaxRewrites = 2
+    MaxVariants = 8
+    Cache = {}
+
+    def __init__(self,
+                 op_codes,
+                 input_device=int_input,
+                 output_device=std_output,
+                 memory=Memory,
+                 instruction_set=None,
+                 input_errors=()):
+        super().__init__(op_codes, input_device, output_device, memory,
+                         instruction_set, input_errors)
+        self._reset_blocks()
+
+    def _reset_blocks(self):
+        self._blocks = {}
+        self._block_cells = {}
+        self._block_ranges = {}
+        self._rewrites = {}
+        self._opcodes = set()
+        self._volatile = set()
+
+    def _compile(self, index):
+        if self._rewrites.get(index, 0) > CompiledComputer.MaxRewrites:
+            self._blocks[index] = None
+            return None
+
+        dense = type(self._memory) is Memory
+        entries = CompiledComputer.Cache.setdefault((index, dense), [])
+        for compiled in entries:
+            if compiled.matches(self, self._volatile):
+                break
+        else:
+            builder = BlockBuilder(self, index, self._volatile)
+            function = builder.build()
+            if function is None:
+                self._blocks[index] = None
+                return None
+            cells = tuple(builder.cells())
+            operands = tuple(builder.operands())
+            compiled = CompiledBlock(
+                function, cells, tuple(self.get(c) for c in cells),
+                tuple(builder.opcodes()), operands,
+                tuple(c in self._volatile for c in operands),
+                max(builder.limit(), max(cells)))
+            if len(entries) >= CompiledComputer.MaxVariants:
+                entries.pop(0)
+            entries.append(compiled)
+
+        self._blocks[index] = compiled.function
+        self._block_ranges[index] = compiled.cells
+        self._opcodes.update(compiled.opcodes)
+        for cell in compiled.cells:
+            self._block_cells.setdefault(cell, []).append(index)
+        return compiled.function
+
+    def _invalidate(self, cell):
+        starts = self._block_cells.pop(cell, None)
+        if not starts:
+            return False
+        if cell not in self._opcodes:
+            self._volatile.add(cell)
+        for start in starts:
+            self._blocks.pop(start, None)
+            if cell in self._opcodes:
+                self._rewrites[start] = self._rewrites.get(start, 0) + 1
+            for other in self._block_ranges.pop(start, ()):
+                owners = self._block_cells.get(other)
+                if owners and start in owners:
+                    owners.remove(start)
+        return True
+
+    def set(self, index, value):
+        super().set(index, value)
+        if index in self._block_cells:
+            self._invalidate(index)
+
+    def _write(self, index, value):
+        super().set(index, value)
+        if index in self._block_cells:
+            return self._invalidate(index)
+        return False
+
+    def restore(self, snapshot):
+        super().restore(snapshot)
+        self._reset_blocks()
+
+    def blocks(self):
+        return sum(1 for block in self._blocks.values() if block is not None)
+
+    def _block(self):
+        if self._profiler is not None:
+            return None
+        block = self._blocks.get(self._index, False)
+        if block is False:
+            block = self._compile(self._index)
+        return block
+
+    def _run_block(self, block):
+        memory = self._memory
+        cells = memory._cells if type(memory) is Memory else None
+        try:
+            self._index, self._offset, count = block(
+                memory, cells, self._offset, self.get, self._write,
+                self._block_cells, self._decoded)
+        except (ValueError, IndexError) as e:
+            self._unwind(block, e.__traceback__)
+            raise
+        self._counter += count
+        # A taken jump to its own address is a zero-size step, which the
+        # interpreter treats as a stop.
+        return block.jump != (self._index, count)
+
+    def _unwind(self, block, traceback):
+        while traceback is not None:
+            frame = traceback.tb_frame
+            if frame.f_code is block.__code__:
+                # Line 1 is the def; each later line maps to the
+                # instruction that emitted it.
+                index, count = block.origins[traceback.tb_lineno - 2]
+                self._index = index
+                self._offset = frame.f_locals['rb']
+                self._counter += count
+                return
+            traceback = traceback.tb_next
+
+    def run(self, max_steps=None, deadline=None):
+        # Budgets are checked between blocks, so a run may overshoot
+        # max_steps by up to one block (BlockBuilder.MaxLength steps).
+        limit = None if max_steps is None else self._counter + max_steps
+        check = self._counter + Computer.Slice
+        while True:
+            if limit is not None and self._counter >= limit:
+                return Status.EXHAUSTED
+            if deadline is not None and self._counter >= check:
+                if perf_counter() >= deadline:
+                    return Status.EXHAUSTED
+                check = self._counter + Computer.Slice
+            block = self._block()
+            if block is None:
+                if not self.step():
+                    return self.status()
+                continue
+            if not self._run_block(block):
+                return self.status()
+
+    def run_until_io(self):
+        while True:
+            block = self._block()
+            if block is None:
+                result = self._io_tick()
+                if result is not None:
+                    return result
+                continue
+            self._run_block(block)
@@ -1,7 +1,15 @@
 #!/usr/bin/env python3
 
+import hashlib
+import json
+import os
+import struct
+import sys
+from array import array
+from collections import Counter, deque
+from copy import copy
 from enum import Enum
-from operator import add, mul, lt, eq, truth, not_
+from time import perf_counter
 
 
 class OpCode(Enum):
@@ -23,6 +31,36 @@ class ParamMode(Enum):
     RELATIVE = 2
 
 
+class Status(Enum):
+    HALTED = 0
+    BLOCKED = 1
+    OUTPUT = 2
+    EXHAUSTED = 3
+
+
+class Event(Enum):
+    INPUT = 0
+    OUTPUT = 1
+
+
+ParamCount = {
+    OpCode.ADD: 3,
+    OpCode.MULTIPLY: 3,
+    OpCode.INPUT: 1,
+    OpCode.OUTPUT: 1,
+    OpCode.JMP_IF_TRUE: 2,
+    OpCode.JMP_IF_FALSE: 2,
+    OpCode.LESS_THAN: 3,
+    OpCode.EQUALS: 3,
+    OpCode.OFFSET: 1,
+    OpCode.HALT: 0,
+}
+
+
+JumpOps = frozenset({OpCode.JMP_IF_TRUE, OpCode.JMP_IF_FALSE})
+AddMulOps = frozenset({OpCode.ADD, OpCode.MULTIPLY, OpCode.HALT})
+
+
 def int_input():
     while True:
         try:
@@ -35,20 +73,323 @@ def std_output(value):
     print(value)
 
 
+class Instruction(object):
+    __slots__ = ('op_code', 'handler', 'modes', 'size')
+
+    def __init__(self, op_code, handler, modes):
+        self.op_code = op_code
+        self.handler = handler
+        self.modes = modes
+        self.size = len(modes) + 1
+
+
+def decode(value):
+    op_code = OpCode(value % 100)
+    modes = []
+    value //= 100
+    for _ in range(ParamCount[op_code]):
+        modes.append(ParamMode(value % 10))
+        value //= 10
+    return op_code, tuple(modes)
+
+
+class Memory(object):
+    def __init__(self, values):
+        self._cells = list(values)
+        self._size = len(self._cells)
+
+    def __len__(self):
+        return self._size
+
+    def reserve(self, index):
+        if index < self._size:
+            return
+        capacity = len(self._cells)
+        if index >= capacity:
+            capacity = max(index + 1, capacity * 2)
+            self._cells.extend([0] * (capacity - len(self._cells)))
+        self._size = index + 1
+
+    def get(self, index):
+        if index >= self._size:
+            self.reserve(index)
+        return self._cells[index]
+
+    def set(self, index, value):
+        if index >= self._size:
+            self.reserve(index)
+        self._cells[index] = value
+
+    def data(self):
+        return self._cells[:self._size]
+
+    def copy(self):
+        memory = Memory.__new__(Memory)
+        memory._cells = self._cells[:]
+        memory._size = self._size
+        return memory
+
+
+class PagedMemory(object):
+    PageBits = 10
+    PageSize = 1 << PageBits
+    PageMask = PageSize - 1
+
+    def __init__(self, values):
+        self._pages = {}
+        self._owned = set()
+        self._size = len(values)
+        for start in range(0, len(values), PagedMemory.PageSize):
+            page = list(values[start:start + PagedMemory.PageSize])
+            page.extend([0] * (PagedMemory.PageSize - len(page)))
+            self._pages[start >> PagedMemory.PageBits] = page
+            self._owned.add(start >> PagedMemory.PageBits)
+
+    def __len__(self):
+        return self._size
+
+    def reserve(self, index):
+        if index >= self._size:
+            self._size = index + 1
+
+    def get(self, index):
+        if index >= self._size:
+            self._size = index + 1
+        page = self._pages.get(index >> PagedMemory.PageBits)
+        if page is None:
+            return 0
+        return page[index & PagedMemory.PageMask]
+
+    def set(self, index, value):
+        if index >= self._size:
+            self._size = index + 1
+        number = index >> PagedMemory.PageBits
+        if number in self._owned:
+            page = self._pages[number]
+        else:
+            page = self._pages.get(number)
+            page = page[:] if page is not None else [0] * PagedMemory.PageSize
+            self._pages[number] = page
+            self._owned.add(number)
+        page[index & PagedMemory.PageMask] = value
+
+    def pages(self):
+        return len(self._pages)
+
+    def copy(self):
+        memory = PagedMemory.__new__(PagedMemory)
+        memory._pages = dict(self._pages)
+        memory._owned = set()
+        memory._size = self._size
+        self._owned = set()
+        return memory
+
+    def data(self):
+        values = [0] * self._size
+        for number, page in self._pages.items():
+            start = number << PagedMemory.PageBits
+            if start >= self._size:
+                continue
+            end = min(start + PagedMemory.PageSize, self._size)
+            values[start:end] = page[:end - start]
+        return values
+
+
+class Profiler(object):
+    def __init__(self, stream=sys.stderr, path=None):
+        self.opcodes = Counter()
+        self.addresses = Counter()
+        self.inputs = 0
+        self.outputs = 0
+        self.input_time = 0.0
+        self.output_time = 0.0
+        self.tick_time = 0.0
+        self.high_water = 0
+        self._stream = stream
+        self._path = path
+        self._halted = False
+        self.input_device = None
+        self.output_device = None
+
+    def wrap_input(self, device):
+        self.input_device = device
+
+        def timed_input():
+            start = perf_counter()
+            try:
+                return device()
+            finally:
+                self.inputs += 1
+                self.input_time += perf_counter() - start
+        return timed_input
+
+    def wrap_output(self, device):
+        self.output_device = device
+
+        def timed_output(value):
+            start = perf_counter()
+            try:
+                return device(value)
+            finally:
+                self.outputs += 1
+                self.output_time += perf_counter() - start
+        return timed_output
+
+    def record(self, index, op_code):
+        self.opcodes[op_code] += 1
+        self.addresses[index] += 1
+
+    def interpret_time(self):
+        return self.tick_time - self.input_time - self.output_time
+
+    def halt(self, computer):
+        self.high_water = max(self.high_water, len(computer._memory))
+        if self._halted:
+            return
+        self._halted = True
+        if self._stream is not None:
+            self._stream.write(self.report() + '\n')
+        if self._path is not None:
+            with open(self._path, 'w') as file:
+                file.write(self.json())
+
+    def summary(self):
+        return {
+            'instructions': sum(self.opcodes.values()),
+            'opcodes': {op.name: count for op, count in self.opcodes.items()},
+            'addresses': {str(index): count
+                          for index, count in self.addresses.most_common()},
+            'inputs': self.inputs,
+            'outputs': self.outputs,
+            'input_time': self.input_time,
+            'output_time': self.output_time,
+            'interpret_time': self.interpret_time(),
+            'high_water': self.high_water,
+        }
+
+    def json(self):
+        return json.dumps(self.summary(), indent=2)
+
+    def report(self, top=10):
+        rows = []
+        rows.append(f"Instructions: {sum(self.opcodes.values())}")
+        rows.append(f"Memory high-water: {self.high_water}")
+        rows.append(f"Interpret time: {self.interpret_time():.6f}s")
+        rows.append(f"Input time: {self.input_time:.6f}s ({self.inputs})")
+        rows.append(f"Output time: {self.output_time:.6f}s ({self.outputs})")
+        rows.append("Opcodes:")
+        for op_code, count in self.opcodes.most_common():
+            rows.append(f"  {op_code.name:<14}{count:>12}")
+        rows.append(f"Hot addresses (top {top}):")
+        for index, count in self.addresses.most_common(top):
+            rows.append(f"  {index:<14}{count:>12}")
+        return '\n'.join(rows)
+
+
+def zigzag(value):
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def write_varint(buffer, value):
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, position):
+    value = 0
+    shift = 0
+    while True:
+        if position >= len(data):
+            raise EOFError('Truncated trace')
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+TraceMagic = b'INTT\x01'
+
+
+class Tracer(object):
+    def __init__(self, stream, counter=0):
+        self._stream = stream
+        self._counter = counter
+        self.events = 0
+        header = bytearray(TraceMagic)
+        write_varint(header, counter)
+        stream.write(header)
+
+    def record(self, event, counter, value):
+        buffer = bytearray()
+        write_varint(buffer, (counter - self._counter) << 1 | event.value)
+        write_varint(buffer, zigzag(value))
+        self._stream.write(buffer)
+        self._counter = counter
+        self.events += 1
+
+    def flush(self):
+        self._stream.flush()
+
+
+def read_trace(data):
+    if not isinstance(data, (bytes, bytearray)):
+        data = data.read()
+    if data[:len(TraceMagic)] != TraceMagic:
+        raise ValueError('Not an intcode trace')
+    counter, position = read_varint(data, len(TraceMagic))
+    while position < len(data):
+        tag, position = read_varint(data, position)
+        value, position = read_varint(data, position)
+        counter += tag >> 1
+        yield Event(tag & 1), counter, unzigzag(value)
+
+
+class Snapshot(object):
+    __slots__ = ('index', 'offset', 'counter', 'memory', 'decoded', 'inputs')
+
+    def __init__(self, index, offset, counter, memory, decoded, inputs):
+        self.index = index
+        self.offset = offset
+        self.counter = counter
+        self.memory = memory
+        self.decoded = decoded
+        self.inputs = inputs
+
+
 class Computer(object):
     _id = 0
+    Instructions = {}
+    Slice = 1024
 
     def __init__(self,
                  op_codes,
                  input_device=int_input,
-                 output_device=std_output):
-        self._data = op_codes[:]
+                 output_device=std_output,
+                 memory=Memory,
+                 instruction_set=None,
+                 input_errors=()):
+        self._memory = memory(op_codes)
         self._index = 0
         self._counter = 0
         self._offset = 0
         self._input = input_device
         self._output = output_device
         self._debug = False
+        self._decoded = {}
+        self._decoded_shared = False
+        self._instruction_set = instruction_set
+        self._input_errors = input_errors
+        self._inputs = deque()
+        self._profiler = None
+        self._tracer = None
 
         Computer._id += 1
         self._id = Computer._id
@@ -59,6 +400,28 @@ class Computer(object):
     def debug(self):
         self._debug = True
 
+    def profile(self, stream=sys.stderr, path=None):
+        if self._profiler is None:
+            self._profiler = Profiler(stream, path)
+            self._input = self._profiler.wrap_input(self._input)
+            self._output = self._profiler.wrap_output(self._output)
+            self._tick = self._profiled_tick
+        return self._profiler
+
+    def profiler(self):
+        return self._profiler
+
+    def trace(self, stream):
+        if self._tracer is None:
+            self._tracer = Tracer(stream, self._counter)
+        return self._tracer
+
+    def tracer(self):
+        return self._tracer
+
+    def counter(self):
+        return self._counter
+
     def index(self):
         return self._index
 
@@ -67,25 +430,33 @@ class Computer(object):
         return size
 
     def data(self):
-        return self._data[:]
+        return self._memory.data()
 
     def reserve(self, index):
-        if index >= len(self._data):
-            self._data = self._data + ([0] * (index - len(self._data) + 1))
+        self._memory.reserve(index)
 
     def get(self, index):
         if index < 0:
             raise IndexError('Index is negative')
-        self.reserve(index)
-        return self._data[index]
+        return self._memory.get(index)
 
     def set(self, index, value):
-        self.reserve(index)
-        self._data[index] = value
+        if index < 0:
+            raise IndexError('Index is negative')
+        self._memory.set(index, value)
+        if index in self._decoded:
+            self._own_decoded().pop(index)
+
+    def _own_decoded(self):
+        # Snapshots and forks share the decode cache until one side
+        # writes to it.
+        if self._decoded_shared:
+            self._decoded = dict(self._decoded)
+            self._decoded_shared = False
+        return self._decoded
 
     def op(self):
-        value = self.get(self.index())
-        return OpCode(value % 100)
+        return self.instruction().op_code
 
     def offset(self):
         return self._offset
@@ -97,94 +468,492 @@ class Computer(object):
 
     def param(self, index, immediate=False):
         mode = ParamMode.IMMEDIATE if immediate else self.mode(index)
-        value = self.get(self.index() + index + 1)
+        return self._read(mode, self.index() + index + 1)
+
+    def _read(self, mode, index):
+        memory = self._memory
+        value = memory.get(index)
         if mode is ParamMode.IMMEDIATE:
             return value
         elif mode is ParamMode.RELATIVE:
-            return self.get(self.offset() + value)
-        return self.get(value)
+            value += self._offset
+        if value < 0:
+            raise IndexError('Index is negative')
+        return memory.get(value)
+
+    def _address(self, mode, index):
+        value = self._memory.get(index)
+        if mode is ParamMode.RELATIVE:
+            value += self._offset
+        return value
+
+    def instruction(self, index=None):
+        if index is None:
+            index = self._index
+        instruction = self._decoded.get(index)
+        if instruction is None:
+            instruction = self._plain(self.get(index))
+            if (self._instruction_set is not None and
+                    instruction.op_code not in self._instruction_set):
+                raise ValueError(f"{instruction.op_code} is not supported")
+            self._own_decoded()[index] = instruction
+        return instruction
+
+    def _plain(self, value):
+        instruction = Computer.Instructions.get(value)
+        if instruction is None:
+            op_code, modes = decode(value)
+            handler = Computer.Handlers[op_code]
+            instruction = Instruction(op_code, handler, modes)
+            Computer.Instructions[value] = instruction
+        return instruction
+
+    def supports(self, op_code):
+        return self._instruction_set is None or op_code in self._instruction_set
+
+    def queue_input(self, value):
+        self._inputs.append(value)
+
+    def pending_input(self):
+        return len(self._inputs)
 
     def input(self):
-        value = self._input()
-        if type(value) is int or value is None:
-            return value
-        return int(value, 10)
+        if self._inputs:
+            value = self._inputs.popleft()
+        else:
+            try:
+                value = self._input()
+            except self._input_errors:
+                return None
+            if value is None:
+                return None
+            if type(value) is not int:
+                value = int(value, 10)
+        if self._tracer is not None:
+            self._tracer.record(Event.INPUT, self._counter, value)
+        return value
 
     def output(self, value):
+        if self._tracer is not None:
+            self._tracer.record(Event.OUTPUT, self._counter, value)
         self._output(value)
 
+    def _halt(self, instruction):
+        return 0
+
+    def _add(self, instruction):
+        mode1, mode2, mode3 = instruction.modes
+        index = self._index
+        value = self._read(mode1, index + 1) + self._read(mode2, index + 2)
+        self.set(self._address(mode3, index + 3), value)
+        return 4
+
+    def _multiply(self, instruction):
+        mode1, mode2, mode3 = instruction.modes
+        index = self._index
+        value = self._read(mode1, index + 1) * self._read(mode2, index + 2)
+        self.set(self._address(mode3, index + 3), value)
+        return 4
+
+    def _read_input(self, instruction):
+        index = self._address(instruction.modes[0], self._index + 1)
+        value = self.input()
+        if value is None:
+            self._counter -= 1
+            return 0
+        self.set(index, value)
+        return 2
+
+    def _write_output(self, instruction):
+        self.output(self._read(instruction.modes[0], self._index + 1))
+        return 2
+
+    def _jump_if_true(self, instruction):
+        mode1, mode2 = instruction.modes
+        index = self._index
+        if self._read(mode1, index + 1):
+            return self._read(mode2, index + 2) - index
+        return 3
+
+    def _jump_if_false(self, instruction):
+        mode1, mode2 = instruction.modes
+        index = self._index
+        if not self._read(mode1, index + 1):
+            return self._read(mode2, index + 2) - index
+        return 3
+
+    def _less_than(self, instruction):
+        mode1, mode2, mode3 = instruction.modes
+        index = self._index
+        value = self._read(mode1, index + 1) < self._read(mode2, index + 2)
+        self.set(self._address(mode3, index + 3), 1 if value else 0)
+        return 4
+
+    def _equals(self, instruction):
+        mode1, mode2, mode3 = instruction.modes
+        index = self._index
+        value = self._read(mode1, index + 1) == self._read(mode2, index + 2)
+        self.set(self._address(mode3, index + 3), 1 if value else 0)
+        return 4
+
+    def _adjust_offset(self, instruction):
+        self._offset += self._read(instruction.modes[0], self._index + 1)
+        return 2
+
     def _tick(self):
         self._counter += 1
 
-        op_code = self.op()
-        if op_code is OpCode.HALT:
+        instruction = self._decoded.get(self._index)
+        if instruction is None:
+            instruction = self.instruction()
+        return instruction.handler(self, instruction)
+
+    def _profiled_tick(self):
+        self._counter += 1
+
+        instruction = self._decoded.get(self._index)
+        if instruction is None:
+            instruction = self.instruction()
+        if instruction.op_code is OpCode.HALT:
+            self._profiler.halt(self)
             return 0
 
-        if op_code is OpCode.ADD or op_code is OpCode.MULTIPLY:
-            op = add
-            if op_code is OpCode.MULTIPLY:
-                op = mul
-
-            num1 = self.param(0)
-            num2 = self.param(1)
-            index = self.param(2, True)
-            if self.mode(2) is ParamMode.RELATIVE:
-                index += self.offset()
-            value = op(num1, num2)
-            self.set(index, value)
-            return 4
-
-        if op_code is OpCode.INPUT:
-            index = self.param(0, True)
-            if self.mode(0) is ParamMode.RELATIVE:
-                index += self.offset()
-            value = self.input()
-            if value is None:
-                return 0
-            self.set(index, value)
-            return 2
+        counter = self._counter
+        index = self._index
+        start = perf_counter()
+        size = instruction.handler(self, instruction)
+        self._profiler.tick_time += perf_counter() - start
 
-        if op_code is OpCode.OUTPUT:
-            value = self.param(0)
-            self.output(value)
-            return 2
-
-        if op_code is OpCode.JMP_IF_TRUE or op_code is OpCode.JMP_IF_FALSE:
-            test = self.param(0)
-            target = self.param(1)
-            op = truth if op_code is OpCode.JMP_IF_TRUE else not_
-            jump = 3
-            if op(test):
-                jump = target - self.index()
-            return jump
-
-        if op_code is OpCode.LESS_THAN or op_code is OpCode.EQUALS:
-            num1 = self.param(0)
-            num2 = self.param(1)
-            index = self.param(2, True)
-            if self.mode(2) is ParamMode.RELATIVE:
-                index += self.offset()
-            op = lt if op_code is OpCode.LESS_THAN else eq
-            self.set(index, 1 if op(num1, num2) else 0)
-            return 4
-
-        if op_code is OpCode.OFFSET:
-            offset = self.param(0)
-            self._offset += offset
-            return 2
+        # A blocked input takes its count back and records nothing.
+        if self._counter == counter:
+            self._profiler.record(index, instruction.op_code)
+        return size
 
-    def stopped(self):
-        return self.op() == OpCode.HALT
+    def _share_decoded(self):
+        self._decoded_shared = True
+        return self._decoded
+
+    def snapshot(self):
+        return Snapshot(self._index, self._offset, self._counter,
+                        self._memory.copy(), self._share_decoded(),
+                        deque(self._inputs))
+
+    def restore(self, snapshot):
+        self._index = snapshot.index
+        self._offset = snapshot.offset
+        self._counter = snapshot.counter
+        self._memory = snapshot.memory.copy()
+        self._decoded = snapshot.decoded
+        self._decoded_shared = True
+        self._inputs = deque(snapshot.inputs)
+
+    def fork(self, input_device=None, output_device=None):
+        computer = copy(self)
+        # restore() copies memory and inputs itself, so hand it the live
+        # state rather than a snapshot that would copy them twice.
+        computer.restore(Snapshot(self._index, self._offset, self._counter,
+                                  self._memory, self._share_decoded(),
+                                  self._inputs))
+        computer._tracer = None
+        if self._profiler is not None:
+            del computer._tick
+            computer._input = self._profiler.input_device
+            computer._output = self._profiler.output_device
+            computer._profiler = None
+        if input_device is not None:
+            computer._input = input_device
+        if output_device is not None:
+            computer._output = output_device
 
-    def step(self):
-        return self._step(self._tick())
+        Computer._id += 1
+        computer._id = Computer._id
+        return computer
+
+    def _io_tick(self):
+        instruction = self._decoded.get(self._index)
+        if instruction is None:
+            instruction = self.instruction()
+
+        op_code = instruction.op_code
+        if op_code is OpCode.HALT:
+            if self._profiler is not None:
+                self._profiler.halt(self)
+            return Status.HALTED, None
+        if op_code is OpCode.INPUT and not self._inputs:
+            return Status.BLOCKED, None
 
-    def run(self):
-        while self.step():
-            pass
+        if op_code is OpCode.OUTPUT:
+            self._counter += 1
+            if self._profiler is not None:
+                self._profiler.record(self._index, op_code)
+            value = self._read(instruction.modes[0], self._index + 1)
+            self._index += 2
+            if self._tracer is not None:
+                self._tracer.record(Event.OUTPUT, self._counter, value)
+            return Status.OUTPUT, value
+        self._index += self._tick()
+        return None
+
+    def run_until_io(self):
+        while True:
+            result = self._io_tick()
+            if result is not None:
+                return result
 
+    def stopped(self):
+        return self.op() is OpCode.HALT
 
-def parse_program(file):
-    return [int(c, 10) for c in file.readline().strip().split(',')]
+    def status(self):
+        return Status.HALTED if self.stopped() else Status.BLOCKED
 
+    def step(self):
+        return self._step(self._tick())
 
+    def run(self, max_steps=None, deadline=None):
+        if max_steps is None and deadline is None:
+            while True:
+                size = self._tick()
+                if not size:
+                    return self.status()
+                self._index += size
+
+        limit = None if max_steps is None else self._counter + max_steps
+        while True:
+            end = self._counter + Computer.Slice
+            if limit is not None and limit < end:
+                end = limit
+            while self._counter < end:
+                size = self._tick()
+                if not size:
+                    return self.status()
+                self._index += size
+            if limit is not None and self._counter >= limit:
+                return Status.EXHAUSTED
+            if deadline is not None and perf_counter() >= deadline:
+                return Status.EXHAUSTED
+
+
+Computer.Handlers = {
+    OpCode.ADD: Computer._add,
+    OpCode.MULTIPLY: Computer._multiply,
+    OpCode.INPUT: Computer._read_input,
+    OpCode.OUTPUT: Computer._write_output,
+    OpCode.JMP_IF_TRUE: Computer._jump_if_true,
+    OpCode.JMP_IF_FALSE: Computer._jump_if_false,
+    OpCode.LESS_THAN: Computer._less_than,
+    OpCode.EQUALS: Computer._equals,
+    OpCode.OFFSET: Computer._adjust_offset,
+    OpCode.HALT: Computer._halt,
+}
+
+
+def no_input():
+    return None
+
+
+def no_output(value):
+    pass
+
+
+class Replayer(object):
+    Keyframe = 64
+
+    def __init__(self, program, trace, computer=Computer,
+                 keyframe=Keyframe, **options):
+        self._events = list(read_trace(trace))
+        self._keyframe = keyframe
+        self._computer = computer(program, no_input, no_output, **options)
+        self._keyframes = {0: self._computer.snapshot()}
+        self._position = 0
+
+    def __len__(self):
+        return len(self._events)
+
+    def event(self, number):
+        return self._events[number]
+
+    def events(self):
+        return list(self._events)
+
+    def seek(self, number, input_device=None, output_device=None):
+        if number < 0 or number > len(self._events):
+            raise IndexError(f"No event {number} in trace")
+        start = max(key for key in self._keyframes if key <= number)
+        if number < self._position or start > self._position:
+            self._computer.restore(self._keyframes[start])
+            self._position = start
+
+        computer = self._computer
+        while self._position < number:
+            event, _, value = self._events[self._position]
+            status, result = computer.run_until_io()
+            if event is Event.INPUT:
+                if status is not Status.BLOCKED:
+                    self._diverged(status)
+                computer.queue_input(value)
+                computer.step()
+            elif status is not Status.OUTPUT or result != value:
+                self._diverged(status, result)
+            self._position += 1
+            if self._position % self._keyframe == 0:
+                self._keyframes.setdefault(self._position,
+                                           computer.snapshot())
+        return computer.fork(input_device, output_device)
+
+    def _diverged(self, status, value=None):
+        event, counter, expected = self._events[self._position]
+        raise ValueError(
+            f"Trace diverges at event {self._position}: expected "
+            f"{event.name} {expected} at instruction {counter}, "
+            f"got {status.name} {value}")
+
+
+CacheDir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        '.intcode-cache')
+CacheMagic = b'INTC\x01'
+CacheHeader = struct.Struct('<QQ')
+CacheEscape = struct.Struct('<QI')
+CacheMin = -(1 << 63)
+CacheMax = (1 << 63) - 1
+
+
+def cache_path(source):
+    digest = hashlib.sha256(source.encode()).hexdigest()
+    return os.path.join(CacheDir, f"{digest}.bin")
+
+
+def dump_program(program):
+    values = array('q')
+    escapes = []
+    for index, value in enumerate(program):
+        if CacheMin < value <= CacheMax:
+            values.append(value)
+        else:
+            values.append(CacheMin)
+            escapes.append((index, str(value).encode()))
+
+    chunks = [CacheMagic, CacheHeader.pack(len(values), len(escapes)),
+              values.tobytes()]
+    for index, digits in escapes:
+        chunks.append(CacheEscape.pack(index, len(digits)))
+        chunks.append(digits)
+    return b''.join(chunks)
+
+
+def load_program(data):
+    if not data.startswith(CacheMagic):
+        raise ValueError('Invalid program cache')
+    view = memoryview(data)
+    start = len(CacheMagic)
+    count, escapes = CacheHeader.unpack_from(view, start)
+    start += CacheHeader.size
+
+    values = array('q')
+    values.frombytes(view[start:start + count * values.itemsize])
+    if len(values) != count:
+        raise ValueError('Truncated program cache')
+    program = values.tolist()
+    start += count * values.itemsize
+
+    for _ in range(escapes):
+        index, length = CacheEscape.unpack_from(view, start)
+        start += CacheEscape.size
+        if index >= count or start + length > len(view):
+            raise ValueError('Truncated program cache')
+        program[index] = int(bytes(view[start:start + length]), 10)
+        start += length
+    if start != len(view):
+        raise ValueError('Trailing data in program cache')
+    return program
+
+
+def parse_program(file, cache=True):
+    source = file.readline().strip()
+    if not cache:
+        return [int(c, 10) for c in source.split(',')]
+
+    path = cache_path(source)
+    try:
+        with open(path, 'rb') as cached:
+            return load_program(cached.read())
+    except (OSError, ValueError, struct.error):
+        pass
+
+    program = [int(c, 10) for c in source.split(',')]
+    try:
+        os.makedirs(CacheDir, exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as cached:
+            cached.write(dump_program(program))
+        os.replace(temp, path)
+    except OSError:
+        pass
+    return program
+
+
+class Result(object):
+    __slots__ = ('outputs', 'cells', 'error')
+
+    def __init__(self, outputs, cells, error=None):
+        self.outputs = outputs
+        self.cells = cells
+        self.error = error
+
+
+def run_job(program, inputs, patch=None, read=(), **options):
+    outputs = []
+    computer = Computer(program, lambda: None, outputs.append, **options)
+    for index, value in (patch or {}).items():
+        computer.set(index, value)
+    for value in inputs:
+        computer.queue_input(value)
+    try:
+        computer.run()
+    except (ValueError, IndexError) as e:
+        return Result(outputs, None, e)
+    return Result(outputs, [computer.get(index) for index in read])
+
+
+_worker = {}
+
+
+def _init_worker(program, runner, options):
+    _worker['program'] = program
+    _worker['runner'] = runner
+    _worker['options'] = options
+
+
+def _run_chunk(jobs, patches):
+    program = _worker['program']
+    runner = _worker['runner']
+    options = _worker['options']
+    results = []
+    for job, patch in zip(jobs, patches):
+        if patch is None:
+            results.append(runner(program, job, **options))
+        else:
+            results.append(runner(program, job, patch=patch, **options))
+    return results
+
+
+def run_many(program, inputs, workers=None, patches=None, until=None,
+             runner=run_job, chunk=16, **options):
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = list(inputs)
+    patches = list(patches) if patches is not None else [None] * len(jobs)
+
+    results = []
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(program, runner, options)) as executor:
+        futures = [executor.submit(_run_chunk, jobs[n:n + chunk],
+                                   patches[n:n + chunk])
+                   for n in range(0, len(jobs), chunk)]
+        for n, future in enumerate(futures):
+            for result in future.result():
+                results.append(result)
+                if until is not None and until(result):
+                    for pending in futures[n + 1:]:
+                        pending.cancel()
+                    return results
+    return results
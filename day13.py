@@ -1,183 +1,15 @@
 #!/usr/bin/env python3
 
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
-from operator import add, mul, lt, eq, truth, not_
-from collections import deque
-from itertools import permutations
+from compiler import CompiledComputer
+from computer import parse_program
+from display import FrameBuffer
+from grid import Grid
 
 
-class OpCode(Enum):
-    ADD = 1
-    MULTIPLY = 2
-    INPUT = 3
-    OUTPUT = 4
-    JMP_IF_TRUE = 5
-    JMP_IF_FALSE = 6
-    LESS_THAN = 7
-    EQUALS = 8
-    OFFSET = 9
-    HALT = 99
-
-
-class ParamMode(Enum):
-    POSITION = 0
-    IMMEDIATE = 1
-    RELATIVE = 2
-
-
-def int_input():
-    while True:
-        try:
-            return int(input("Input> "), 10)
-        except ValueError:
-            print("Invalid integer value. Try again.")
-
-
-def std_output(value):
-    print(value)
-
-
-class Computer(object):
-    _id = 0
-
-    def __init__(self, op_codes, input_device, output_device):
-        self._data = op_codes[:]
-        self._index = 0
-        self._counter = 0
-        self._offset = 0
-        self._input = input_device
-        self._output = output_device
-
-        Computer._id += 1
-        self._id = Computer._id
-
-    def id(self):
-        return self._id
-
-    def index(self):
-        return self._index
-
-    def step(self, size):
-        self._index += size
-        return size
-
-    def data(self):
-        return self._data[:]
-
-    def reserve(self, index):
-        if index >= len(self._data):
-            self._data = self._data + ([0] * (index - len(self._data) + 1))
-
-    def get(self, index):
-        if index < 0:
-            raise IndexError('Index is negative')
-        self.reserve(index)
-        return self._data[index]
-
-    def set(self, index, value):
-        self.reserve(index)
-        self._data[index] = value
-
-    def op(self):
-        value = self.get(self.index())
-        return OpCode(value % 100)
-
-    def offset(self):
-        return self._offset
-
-    def mode(self, index):
-        value = self.get(self.index())
-        place = 10**(2 + index)
-        return ParamMode((value // place) % 10)
-
-    def param(self, index, immediate=False):
-        mode = ParamMode.IMMEDIATE if immediate else self.mode(index)
-        value = self.get(self.index() + index + 1)
-        if mode is ParamMode.IMMEDIATE:
-            return value
-        elif mode is ParamMode.RELATIVE:
-            return self.get(self.offset() + value)
-        return self.get(value)
-
-    def input(self):
-        value = self._input()
-        if type(value) is int or value is None:
-            return value
-        return int(value, 10)
-
-    def output(self, value):
-        self._output(value)
-
-    def tick(self):
-        self._counter += 1
-
-        op_code = self.op()
-        if op_code is OpCode.HALT:
-            return 0
-
-        if op_code is OpCode.ADD or op_code is OpCode.MULTIPLY:
-            op = add
-            if op_code is OpCode.MULTIPLY:
-                op = mul
-
-            num1 = self.param(0)
-            num2 = self.param(1)
-            index = self.param(2, True)
-            if self.mode(2) is ParamMode.RELATIVE:
-                index += self.offset()
-            value = op(num1, num2)
-            self.set(index, value)
-            return 4
-
-        if op_code is OpCode.INPUT:
-            index = self.param(0, True)
-            if self.mode(0) is ParamMode.RELATIVE:
-                index += self.offset()
-            value = self.input()
-            if value is None:
-                return 0
-            self.set(index, value)
-            return 2
-
-        if op_code is OpCode.OUTPUT:
-            value = self.param(0)
-            self.output(value)
-            return 2
-
-        if op_code is OpCode.JMP_IF_TRUE or op_code is OpCode.JMP_IF_FALSE:
-            test = self.param(0)
-            target = self.param(1)
-            op = truth if op_code is OpCode.JMP_IF_TRUE else not_
-            jump = 3
-            if op(test):
-                jump = target - self.index()
-            return jump
-
-        if op_code is OpCode.LESS_THAN or op_code is OpCode.EQUALS:
-            num1 = self.param(0)
-            num2 = self.param(1)
-            index = self.param(2, True)
-            if self.mode(2) is ParamMode.RELATIVE:
-                index += self.offset()
-            op = lt if op_code is OpCode.LESS_THAN else eq
-            self.set(index, 1 if op(num1, num2) else 0)
-            return 4
-
-        if op_code is OpCode.OFFSET:
-            offset = self.param(0)
-            self._offset += offset
-            return 2
-
-    def stopped(self):
-        return self.op() == OpCode.HALT
-
-    def run(self):
-        while self.step(self.tick()):
-            pass
-
-
-class ArcadeCabinet(Computer):
+class ArcadeCabinet(object):
     class Tile(Enum):
         EMPTY = 0
         WALL = 1
@@ -193,28 +25,89 @@ class ArcadeCabinet(Computer):
         Tile.BALL: '●',
     }
 
-    def __init__(self, program):
-        super().__init__(program, self._processInput, self._processOutput)
-        self._tiles = {}
-        self._bounds = ((float('inf'), float('inf')),
-                        (float('-inf'), float('-inf')))
+    class Mode(Enum):
+        FOLLOW = 'follow'
+        AUTOPILOT = 'autopilot'
+        WALL = 'wall'
+
+    def __init__(self, program, render_every=1, mode=Mode.FOLLOW):
+        self._computer = CompiledComputer(program, self._processInput,
+                                          self._processOutput)
+        self._render_every = render_every
+        self._mode = mode
+        self._walled = False
+        self._frames = 0
+        self._screen = FrameBuffer()
+        self._tiles = Grid(ArcadeCabinet.Tile.EMPTY.value)
         self._input_queue = []
         self._score = 0
         self._ball = None
+        self._last_ball = None
         self._paddle = None
 
     def _processInput(self):
-        score = self.score()
-        print(self.display())
+        self._frames += 1
+        if self._render_every and self._frames % self._render_every == 0:
+            self._screen.status(self.scoreLine())
+            self._screen.draw()
 
-        ball_x, _ = self._ball
+        if self._mode is ArcadeCabinet.Mode.WALL:
+            if self._walled or self.buildWall():
+                return 0
+            self._mode = ArcadeCabinet.Mode.AUTOPILOT
+
+        if self._mode is ArcadeCabinet.Mode.AUTOPILOT:
+            target_x = self.predictLanding()
+        else:
+            target_x, _ = self._ball
         paddle_x, _ = self._paddle
-        if ball_x < paddle_x:
+        if target_x < paddle_x:
             return -1
-        elif ball_x > paddle_x:
+        elif target_x > paddle_x:
             return 1
         return 0
 
+    def predictLanding(self):
+        ball_x, ball_y = self._ball
+        if self._last_ball is None:
+            return ball_x
+        last_x, last_y = self._last_ball
+        dx = ball_x - last_x
+        dy = ball_y - last_y
+        if dy <= 0 or dx == 0:
+            return ball_x
+
+        (min_x, _), (max_x, _) = self.bounds()
+        _, paddle_y = self._paddle
+        low, high = min_x + 1, max_x - 1
+        span = high - low
+        if span <= 0:
+            return ball_x
+        x = ball_x + dx * (paddle_y - 1 - ball_y) - low
+        x %= 2 * span
+        return low + (x if x <= span else 2 * span - x)
+
+    def buildWall(self):
+        (min_x, _), (max_x, _) = self.bounds()
+        _, paddle_y = self._paddle
+        row = [self._tiles.get(x, paddle_y) for x in range(min_x, max_x + 1)]
+        memory = self._computer.data()
+        for index in range(len(memory) - len(row) + 1):
+            if memory[index:index + len(row)] == row:
+                break
+        else:
+            return False
+
+        wall = ArcadeCabinet.Tile.WALL
+        for x in range(min_x + 1, max_x):
+            self._computer.set(index + x - min_x, wall.value)
+            self.plot(x, paddle_y, wall)
+        self._walled = True
+        return True
+
+    def run(self):
+        self._computer.run()
+
     def _processOutput(self, value):
         self._input_queue.append(value)
         if len(self._input_queue) == 3:
@@ -226,44 +119,26 @@ class ArcadeCabinet(Computer):
             else:
                 tile = ArcadeCabinet.Tile(value)
                 if tile is ArcadeCabinet.Tile.BALL:
+                    self._last_ball = self._ball
                     self._ball = (x, y)
                 elif tile is ArcadeCabinet.Tile.HOR_PADDLE:
                     self._paddle = (x, y)
                 self.plot(x, y, tile)
 
     def plot(self, x, y, tile):
-        self._tiles[(x, y)] = tile
-
-        (min_x, min_y), (max_x, max_y) = self._bounds
-        min_x = min(min_x, x)
-        min_y = min(min_y, y)
-        max_x = max(max_x, x)
-        max_y = max(max_y, y)
-
-        self._bounds = ((min_x, min_y), (max_x, max_y))
+        self._tiles.set(x, y, tile.value)
+        self._screen.set(x, y, ArcadeCabinet.TileMap[tile])
 
     def bounds(self):
-        return self._bounds
+        return self._tiles.bounds()
+
+    def scoreLine(self):
+        return f"                          Score: {self._score:010}"
 
     def display(self):
-        (min_x, min_y), (max_x, max_y) = self.bounds()
-        width = max_x - min_x + 1
-        height = max_y - min_y + 1
-        rows = []
-        rows.append(''.join(['╔']+(['═'] * width) + ['╗']))
-        for y in range(height):
-            row = ['║']
-            for x in range(width):
-                pos = (x, y)
-                tile = ArcadeCabinet.Tile.EMPTY
-                if pos in self._tiles:
-                    tile = self._tiles[pos]
-                row.append(ArcadeCabinet.TileMap[tile])
-            row.append('║')
-            rows.append(''.join(row))
-        rows.append(''.join(['╚']+(['═'] * width) + ['╝']))
-        rows.append(f"                          Score: {self._score:010}")
-        return '\n'.join(rows)
+        (_, _), (max_x, max_y) = self.bounds()
+        board = self._screen.text(((0, 0), (max_x, max_y)))
+        return f"{board}\n{self.scoreLine()}"
 
     def setScore(self, score):
         self._score = score
@@ -271,50 +146,111 @@ class ArcadeCabinet(Computer):
     def score(self):
         return self._score
 
+    def frames(self):
+        return self._frames
+
+    def instructions(self):
+        return self._computer.counter()
+
     def insertQuarters(self, count):
-        self.set(0, count)
+        self._computer.set(0, count)
 
     def countTiles(self, tile):
-        return list(self._tiles.values()).count(tile)
+        return self._tiles.count(tile.value)
+
+
+def play(program, mode=ArcadeCabinet.Mode.WALL):
+    game = ArcadeCabinet(program, 0, mode)
+    game.insertQuarters(2)
+    game.run()
+    return game.score()
+
+
+def score_cabinets(programs, mode=ArcadeCabinet.Mode.WALL, workers=None,
+                   chunk=16):
+    programs = list(programs)
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(play, programs, [mode] * len(programs),
+                                 chunksize=chunk))
 
 
 def part1(file):
-    program = list(map(lambda x: int(x, 10), file.readline().split(',')))
+    program = parse_program(file)
     game = ArcadeCabinet(program)
     game.run()
     count = game.countTiles(ArcadeCabinet.Tile.BLOCK)
     print(f"Answer: {count}")
 
 
-def part2(file):
-    program = list(map(lambda x: int(x, 10), file.readline().split(',')))
-    game = ArcadeCabinet(program)
+def part2(file, render_every=1, mode=ArcadeCabinet.Mode.FOLLOW):
+    program = parse_program(file)
+    game = ArcadeCabinet(program, render_every, mode)
     game.insertQuarters(2)
     game.run()
     score = game.score()
-    print(game.display())
+    if render_every:
+        print(game.display())
+    else:
+        print(f"Frames: {game.frames()}")
+        print(f"Instructions: {game.instructions()}")
+        print(f"Blocks left: {game.countTiles(ArcadeCabinet.Tile.BLOCK)}")
     print(f"Final Score: {score}")
 
 
-def main(part, file):
+def score_main(args):
+    modes = [mode.value for mode in ArcadeCabinet.Mode]
+    mode = ArcadeCabinet.Mode.WALL
+    if args and args[0] in modes:
+        mode = ArcadeCabinet.Mode(args[0])
+        args = args[1:]
+    if not args:
+        print(f"usage: {sys.argv[0]} score [{'|'.join(modes)}] "
+              f"filename [filename...]")
+        print(f"")
+        exit(1)
+
+    programs = []
+    for filename in args:
+        try:
+            with open(filename) as file:
+                programs.append(parse_program(file))
+        except FileNotFoundError as e:
+            print(e)
+            exit(1)
+
+    for filename, score in zip(args, score_cabinets(programs, mode)):
+        print(f"{filename}: {score}")
+
+
+def main(part, file, render_every=1, mode=ArcadeCabinet.Mode.FOLLOW):
     if file.isatty():
         print("Awaiting input from stdin...")
 
     if part == 1:
         part1(file)
     elif part == 2:
-        part2(file)
+        part2(file, render_every, mode)
 
 
 if __name__ == "__main__":
-    if (len(sys.argv) < 2 or len(sys.argv) > 3 or (sys.argv[1] != "1" and sys.argv[1] != "2")):
-        print(f"usage: {sys.argv[0]} part [filename]")
+    if len(sys.argv) >= 2 and sys.argv[1] == "score":
+        score_main(sys.argv[2:])
+        exit(0)
+
+    modes = [mode.value for mode in ArcadeCabinet.Mode]
+    if (len(sys.argv) < 2 or len(sys.argv) > 5 or (sys.argv[1] != "1" and sys.argv[1] != "2") or
+            (len(sys.argv) >= 4 and not sys.argv[3].isdigit()) or
+            (len(sys.argv) == 5 and sys.argv[4] not in modes)):
+        print(f"usage: {sys.argv[0]} part [filename] [render-every] "
+              f"[{'|'.join(modes)}]")
+        print(f"       {sys.argv[0]} score [{'|'.join(modes)}] "
+              f"filename [filename...]")
         print(f"")
         exit(1)
 
     input_file = sys.stdin
 
-    if (len(sys.argv) == 3):
+    if (len(sys.argv) >= 3):
         try:
             filename = sys.argv[2]
             input_file = open(filename)
@@ -322,5 +258,8 @@ if __name__ == "__main__":
             print(e)
             exit(1)
 
+    render_every = int(sys.argv[3], 10) if len(sys.argv) >= 4 else 1
+    mode = ArcadeCabinet.Mode(sys.argv[4] if len(sys.argv) == 5 else 'follow')
+
     with input_file:
-        main(int(sys.argv[1], 10), input_file)
+        main(int(sys.argv[1], 10), input_file, render_every, mode)
@@ -2,183 +2,10 @@
 
 import sys
 from enum import Enum
-from operator import add, mul, lt, eq, truth, not_
 from collections import deque
-from itertools import permutations
-
-
-class OpCode(Enum):
-    ADD = 1
-    MULTIPLY = 2
-    INPUT = 3
-    OUTPUT = 4
-    JMP_IF_TRUE = 5
-    JMP_IF_FALSE = 6
-    LESS_THAN = 7
-    EQUALS = 8
-    OFFSET = 9
-    HALT = 99
-
-
-class ParamMode(Enum):
-    POSITION = 0
-    IMMEDIATE = 1
-    RELATIVE = 2
-
-
-def int_input():
-    while True:
-        try:
-            return int(input("Input> "), 10)
-        except ValueError:
-            print("Invalid integer value. Try again.")
-
-
-def std_output(value):
-    print(value)
-
-
-class Computer(object):
-    _id = 0
-
-    def __init__(self, op_codes, input_device, output_device):
-        self._data = op_codes[:]
-        self._index = 0
-        self._counter = 0
-        self._offset = 0
-        self._input = input_device
-        self._output = output_device
-        self._debug = False
-
-        Computer._id += 1
-        self._id = Computer._id
-
-    def id(self):
-        return self._id
-
-    def debug(self):
-        self._debug = True
-
-    def index(self):
-        return self._index
-
-    def step(self, size):
-        self._index += size
-        return size
-
-    def data(self):
-        return self._data[:]
-
-    def reserve(self, index):
-        if index >= len(self._data):
-            self._data = self._data + ([0] * (index - len(self._data) + 1))
-
-    def get(self, index):
-        if index < 0:
-            raise IndexError('Index is negative')
-        self.reserve(index)
-        return self._data[index]
-
-    def set(self, index, value):
-        self.reserve(index)
-        self._data[index] = value
-
-    def op(self):
-        value = self.get(self.index())
-        return OpCode(value % 100)
-
-    def offset(self):
-        return self._offset
-
-    def mode(self, index):
-        value = self.get(self.index())
-        place = 10**(2 + index)
-        return ParamMode((value // place) % 10)
-
-    def param(self, index, immediate=False):
-        mode = ParamMode.IMMEDIATE if immediate else self.mode(index)
-        value = self.get(self.index() + index + 1)
-        if mode is ParamMode.IMMEDIATE:
-            return value
-        elif mode is ParamMode.RELATIVE:
-            return self.get(self.offset() + value)
-        return self.get(value)
-
-    def input(self):
-        value = self._input()
-        if type(value) is int or value is None:
-            return value
-        return int(value, 10)
-
-    def output(self, value):
-        self._output(value)
-
-    def tick(self):
-        self._counter += 1
-
-        op_code = self.op()
-        if op_code is OpCode.HALT:
-            return 0
-
-        if op_code is OpCode.ADD or op_code is OpCode.MULTIPLY:
-            op = add
-            if op_code is OpCode.MULTIPLY:
-                op = mul
-
-            num1 = self.param(0)
-            num2 = self.param(1)
-            index = self.param(2, True)
-            if self.mode(2) is ParamMode.RELATIVE:
-                index += self.offset()
-            value = op(num1, num2)
-            self.set(index, value)
-            return 4
-
-        if op_code is OpCode.INPUT:
-            index = self.param(0, True)
-            if self.mode(0) is ParamMode.RELATIVE:
-                index += self.offset()
-            value = self.input()
-            if value is None:
-                return 0
-            self.set(index, value)
-            return 2
-
-        if op_code is OpCode.OUTPUT:
-            value = self.param(0)
-            self.output(value)
-            return 2
-
-        if op_code is OpCode.JMP_IF_TRUE or op_code is OpCode.JMP_IF_FALSE:
-            test = self.param(0)
-            target = self.param(1)
-            op = truth if op_code is OpCode.JMP_IF_TRUE else not_
-            jump = 3
-            if op(test):
-                jump = target - self.index()
-            return jump
-
-        if op_code is OpCode.LESS_THAN or op_code is OpCode.EQUALS:
-            num1 = self.param(0)
-            num2 = self.param(1)
-            index = self.param(2, True)
-            if self.mode(2) is ParamMode.RELATIVE:
-                index += self.offset()
-            op = lt if op_code is OpCode.LESS_THAN else eq
-            self.set(index, 1 if op(num1, num2) else 0)
-            return 4
-
-        if op_code is OpCode.OFFSET:
-            offset = self.param(0)
-            self._offset += offset
-            return 2
-
-    def stopped(self):
-        return self.op() == OpCode.HALT
-
-    def run(self):
-        while self.step(self.tick()):
-            pass
+from computer import Computer, Memory, no_input, parse_program
+from display import FrameBuffer
+from grid import Grid
 
 
 class Move(Enum):
@@ -199,7 +26,9 @@ class Block(Enum):
     WALL = 1
 
 
-class RepairDroid(Computer):
+class RepairDroid(object):
+    Unknown = 255
+
     MoveMap = {
         Move.NORTH: (0, -1),
         Move.SOUTH: (0, 1),
@@ -214,18 +43,29 @@ class RepairDroid(Computer):
         Block.WALL: '+',
     }
 
-    def __init__(self, program):
-        super().__init__(program, self._processInput, self._processOutput)
+    def __init__(self, program, memory=Memory):
+        self._computer = Computer(program, self._processInput,
+                                  self._processOutput, memory)
+        self._debug = False
         pos = (0, 0)
         self._pos = pos
         self._path = []
-        self._blocks = {}
-        self._blocks[pos] = Block.EMPTY
-        self._bounds = ((0, 0), (0, 0))
+        self._blocks = Grid(RepairDroid.Unknown)
+        self._screen = FrameBuffer()
+        self._marks = []
+        self.setBlock(pos, Block.EMPTY)
+        self._mark()
         self._target = None
         self._move = None
         self._queued_input = deque([Move.NORTH])
         self._move_offset = 0
+        self._distance = {pos: 0}
+
+    def debug(self):
+        self._debug = True
+
+    def run(self):
+        self._computer.run()
 
     def _processInput(self):
         if not self._queued_input:
@@ -257,8 +97,9 @@ class RepairDroid(Computer):
                 self._pos = pos
                 self.setBlock(pos, Block.EMPTY)
 
+        self._mark()
         if self._debug:
-            print(self.display())
+            self._screen.draw()
 
         x, y = self.pos()
 
@@ -267,8 +108,7 @@ class RepairDroid(Computer):
         for move_index in range(offset, offset + len(moves)):
             move = moves[move_index % len(moves)]
             dx, dy = RepairDroid.MoveMap[move]
-            pos = (x + dx, y + dy)
-            if pos not in self._blocks:
+            if self._blocks.get(x + dx, y + dy) == RepairDroid.Unknown:
                 self._queued_input.append(move)
                 self._move_offset = move_index % len(moves)
                 break
@@ -280,23 +120,31 @@ class RepairDroid(Computer):
                 self._queued_input.append(move)
 
     def setBlock(self, pos, block):
-        self._blocks[pos] = block
-        self.extendBounds(pos)
-
-    def extendBounds(self, pos):
         x, y = pos
-        (min_x, min_y), (max_x, max_y) = self._bounds
-        min_x = min(min_x, x)
-        min_y = min(min_y, y)
-        max_x = max(max_x, x)
-        max_y = max(max_y, y)
-        self._bounds = ((min_x, min_y), (max_x, max_y))
+        self._blocks.set(x, y, block.value)
+        self._screen.set(x, y, RepairDroid.BlockMap[block])
+
+    def _mark(self):
+        screen = self._screen
+        for x, y in self._marks:
+            value = self._blocks.get(x, y)
+            screen.set(x, y, ' ' if value == RepairDroid.Unknown
+                       else RepairDroid.BlockMap[Block(value)])
+        marks = [self._pos]
+        if self._path:
+            marks.append(self._path[-1])
+            x, y = self._path[-1]
+            screen.set(x, y, '◇')
+        x, y = self._pos
+        screen.set(x, y, '◆')
+        self._marks = marks
 
     def pos(self):
         return self._pos
 
     def block(self, pos):
-        return self._blocks[pos]
+        x, y = pos
+        return Block(self._blocks.get(x, y))
 
     def neighbours(self, pos):
         x, y = pos
@@ -307,36 +155,58 @@ class RepairDroid(Computer):
         while self._queued_input:
             self.run()
 
+    def explore(self, stop_at_target=False):
+        outputs = []
+        start = self.pos()
+        computer = self._computer.fork(no_input, outputs.append)
+        frontier = deque([(start, computer)])
+        while frontier:
+            pos, computer = frontier.popleft()
+            x, y = pos
+            moves = [move for move, (dx, dy) in RepairDroid.MoveMap.items()
+                     if self._blocks.get(x + dx, y + dy) == RepairDroid.Unknown]
+            self._pos = pos
+            for index, move in enumerate(moves):
+                probe = computer
+                if index < len(moves) - 1:
+                    probe = computer.fork()
+                probe.queue_input(move.value)
+                probe.run()
+                status = Status(outputs.pop())
+
+                dx, dy = RepairDroid.MoveMap[move]
+                next_pos = (x + dx, y + dy)
+                if status is Status.INVALID:
+                    self.setBlock(next_pos, Block.WALL)
+                    continue
+
+                self.setBlock(next_pos, Block.EMPTY)
+                self._distance[next_pos] = self._distance[pos] + 1
+                frontier.append((next_pos, probe))
+                if status is Status.FOUND:
+                    self._target = next_pos
+                    if stop_at_target:
+                        return self._target
+
+            self._mark()
+            if self._debug:
+                self._screen.draw()
+        return self._target
+
+    def distance(self, pos):
+        return self._distance[pos]
+
     def bounds(self):
-        return self._bounds
+        return self._blocks.bounds()
 
     def target(self):
         return self._target
 
+    def screen(self):
+        return self._screen
+
     def displayAll(self):
-        (min_x, min_y), (max_x, max_y) = self.bounds()
-        rows = []
-        rows.append(''.join(['╔'] + (['═'] * (max_x - min_x + 1)) + ['╗']))
-        current_pos = self.pos()
-        prev_pos = self._path[-1] if self._path else None
-        for y in range(min_y, max_y + 1):
-            row = ['║']
-            for x in range(min_x, max_x + 1):
-                pos = (x, y)
-                if pos == current_pos:
-                    row.append('◆')
-                    continue
-                if prev_pos and prev_pos == pos:
-                    row.append('◇')
-                    continue
-                if pos not in self._blocks:
-                    row.append(' ')
-                    continue
-                row.append(RepairDroid.BlockMap[self._blocks[pos]])
-            row.append('║')
-            rows.append(''.join(row))
-        rows.append(''.join(['╚'] + (['═'] * (max_x - min_x + 1)) + ['╝']))
-        return '\n'.join(rows)
+        return self._screen.text(self.bounds())
 
     def display(self):
         x, y = self.pos()
@@ -346,58 +216,21 @@ class RepairDroid(Computer):
         max_x = min_x + width
         min_y = y - (height // 2)
         max_y = min_y + height
-        rows = []
-        rows.append(''.join(['╔'] + (['═'] * (max_x - min_x + 1)) + ['╗']))
-        current_pos = self.pos()
-        prev_pos = self._path[-1] if self._path else None
-        for y in range(min_y, max_y + 1):
-            row = ['║']
-            for x in range(min_x, max_x + 1):
-                pos = (x, y)
-                if pos == current_pos:
-                    row.append('◆')
-                    continue
-                if prev_pos and prev_pos == pos:
-                    row.append('◇')
-                    continue
-                if pos not in self._blocks:
-                    row.append(' ')
-                    continue
-                row.append(RepairDroid.BlockMap[self._blocks[pos]])
-            row.append('║')
-            rows.append(''.join(row))
-        rows.append(''.join(['╚'] + (['═'] * (max_x - min_x + 1)) + ['╝']))
-        return '\n'.join(rows)
+        return self._screen.text(((min_x, min_y), (max_x, max_y)))
 
 
 def part1(file):
-    program = list(map(lambda x: int(x, 10), file.readline().split(',')))
+    program = parse_program(file)
     droid = RepairDroid(program)
-    droid.map()
-    start = (0, 0)
-    target = droid.target()
-    dist = {}
-    dist[start] = 0
-    queued = deque([start])
-    while queued:
-        pos = queued.popleft()
-        prev_dist = dist[pos]
-        for next_pos in droid.neighbours(pos):
-            block = droid.block(next_pos)
-            if block is Block.WALL:
-                continue
-            new_dist = prev_dist + 1
-            if next_pos not in dist or new_dist < dist[next_pos]:
-                dist[next_pos] = new_dist
-                queued.append(next_pos)
-    answer = dist[target]
+    target = droid.explore(stop_at_target=True)
+    answer = droid.distance(target)
     print(f"Answer: {answer}")
 
 
 def part2(file):
-    program = list(map(lambda x: int(x, 10), file.readline().split(',')))
+    program = parse_program(file)
     droid = RepairDroid(program)
-    droid.map()
+    droid.explore()
     start = droid.target()
     dist = {}
     dist[start] = 0
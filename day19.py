@@ -1,34 +1,15 @@
 #!/usr/bin/env python3
 
 import sys
-from computer import Computer, parse_program
-
-def gen_coord(w, h):
-    for y in range(h):
-        for x in range(w):
-            yield x
-            yield y
-
+from computer import parse_program
+from batch import BatchComputer
 
 def part1(file):
-    counter = 0
-    coord_generator = gen_coord(50, 50)
-
-    def coord_input():
-        value = next(coord_generator)
-        return value
-
-    def count_output(value):
-        nonlocal counter
-        counter += value
-
     program = parse_program(file)
-    while True:
-        computer = Computer(program, coord_input, count_output)
-        try:
-            computer.run()
-        except StopIteration:
-            break
+    coords = [[x, y] for y in range(50) for x in range(50)]
+    batch = BatchComputer(program, len(coords), coords)
+    batch.run()
+    counter = sum(sum(batch.outputs(lane)) for lane in range(batch.lanes()))
     print(f"Answer: {counter}")
 
 
@@ -1,64 +1,13 @@
 #!/usr/bin/env python3
 
 import sys
-from enum import Enum
-from operator import add, mul
-
-
-class OpCode(Enum):
-    ADD = 1
-    MULTIPLY = 2
-    HALT = 99
-
-
-class Computer(object):
-    def __init__(self, op_codes):
-        self._data = op_codes[:]
-        self._index = 0
-        self._counter = 0
-
-    def index(self):
-        return self._index
-
-    def step(self):
-        self._index += 4
-
-    def data(self):
-        return self._data[:]
-
-    def get(self, index):
-        return self._data[index]
-
-    def set(self, index, value):
-        self._data[index] = value
-
-    def tick(self):
-        self._counter += 1
-
-        op_code = OpCode(self.get(self.index()))
-        if op_code is OpCode.HALT:
-            return False
-
-        op = add
-        if op_code is OpCode.MULTIPLY:
-            op = mul
-
-        num1 = self.get(self.get(self.index() + 1))
-        num2 = self.get(self.get(self.index() + 2))
-        index = self.get(self.index() + 3)
-        value = op(num1, num2)
-        self.set(index, value)
-
-        return True
-
-    def run(self):
-        while self.tick():
-            self.step()
+from batch import BatchComputer
+from computer import AddMulOps, Computer, parse_program
 
 
 def part1(file):
-    op_codes = list(map(lambda x: int(x, 10), file.read().split(',')))
-    computer = Computer(op_codes)
+    op_codes = parse_program(file)
+    computer = Computer(op_codes, instruction_set=AddMulOps)
     computer.set(1, 12)
     computer.set(2, 2)
     computer.run()
@@ -66,22 +15,22 @@ def part1(file):
 
 
 def part2(file):
-    op_codes = list(map(lambda x: int(x, 10), file.read().split(',')))
-
-    for noun in range(100):
-        for verb in range(100):
-            try:
-                computer = Computer(op_codes)
-                computer.set(1, noun)
-                computer.set(2, verb)
-                computer.run()
-
-                if 19690720 == computer.get(0):
-                    print(f"Answer: {100 * noun + verb}")
-                    return
-            except Exception as e:
-                print(e)
-                continue
+    op_codes = parse_program(file)
+
+    batch = BatchComputer(op_codes, 100 * 100, instruction_set=AddMulOps)
+    batch.set(1, [noun for noun in range(100) for verb in range(100)])
+    batch.set(2, [verb for noun in range(100) for verb in range(100)])
+    batch.run()
+
+    for lane, value in enumerate(batch.get(0)):
+        if batch.failed(lane):
+            print(batch.error(lane))
+            continue
+
+        if 19690720 == value:
+            noun, verb = divmod(lane, 100)
+            print(f"Answer: {100 * noun + verb}")
+            return
 
     print('Failed to find result')
 
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
 import sys
-from computer import Computer, parse_program
+from computer import parse_program
+from compiler import CompiledComputer
 from collections import deque
 
 
@@ -39,7 +40,7 @@ def part1(file):
     chr_input.extend("WALK\n")
 
     program = parse_program(file)
-    computer = Computer(program, chr_input, chr_output)
+    computer = CompiledComputer(program, chr_input, chr_output)
     computer.run()
 
 
@@ -60,7 +61,7 @@ def part2(file):
     chr_input.extend("RUN\n")
 
     program = parse_program(file)
-    computer = Computer(program, chr_input, chr_output)
+    computer = CompiledComputer(program, chr_input, chr_output)
     computer.run()
 
 
@@ -1,31 +1,160 @@
 #!/usr/bin/env python3
 
 import sys
-from computer import Computer, parse_program
+from array import array
+from compiler import CompiledComputer
+from computer import Computer, Status, parse_program
 from collections import deque
+from multiprocessing import Pipe, Process
+from time import perf_counter
+
+
+class PacketRing(object):
+    Capacity = 64
+
+    def __init__(self, capacity=Capacity):
+        self._words = array('q', bytes(8 * capacity))
+        self._mask = capacity - 1
+        self._head = 0
+        self._tail = 0
+
+    def __bool__(self):
+        return self._head != self._tail
+
+    def __len__(self):
+        return (self._tail - self._head + 1) // 2
+
+    def __iter__(self):
+        words = self._words
+        mask = self._mask
+        for index in range(self._head, self._tail - 1, 2):
+            yield words[index & mask], words[(index + 1) & mask]
+
+    def _grow(self):
+        count = self._tail - self._head
+        words = array('q', bytes(16 * len(self._words)))
+        for index in range(count):
+            words[index] = self._words[(self._head + index) & self._mask]
+        self._words = words
+        self._mask = len(words) - 1
+        self._head = 0
+        self._tail = count
+
+    def write(self, value):
+        if self._tail - self._head > self._mask:
+            self._grow()
+        self._words[self._tail & self._mask] = value
+        self._tail += 1
+
+    def push(self, x, y):
+        if self._tail - self._head >= self._mask:
+            self._grow()
+        tail = self._tail
+        words = self._words
+        mask = self._mask
+        words[tail & mask] = x
+        words[(tail + 1) & mask] = y
+        self._tail = tail + 2
+
+    def read(self):
+        value = self._words[self._head & self._mask]
+        self._head += 1
+        return value
+
+    def popleft(self):
+        return self.read(), self.read()
+
+    def pop(self):
+        tail = self._tail - 2
+        self._tail = tail
+        return (self._words[tail & self._mask],
+                self._words[(tail + 1) & self._mask])
+
+    def clear(self):
+        self._head = self._tail
+
+
+class SharedPacketRing(PacketRing):
+    Capacity = 1 << 14
+
+    def __init__(self, capacity=Capacity, name=None):
+        from multiprocessing import shared_memory
+        self._owner = name is None
+        self._memory = shared_memory.SharedMemory(
+            name=name, create=self._owner, size=8 * (capacity + 2))
+        view = self._memory.buf.cast('q')
+        self._control = view[:2]
+        self._words = view[2:]
+        self._mask = capacity - 1
+        if self._owner:
+            self._control[0] = self._control[1] = 0
+
+    def __reduce__(self):
+        return SharedPacketRing, (self._mask + 1, self._memory.name)
+
+    @property
+    def _head(self):
+        return self._control[0]
+
+    @_head.setter
+    def _head(self, value):
+        self._control[0] = value
+
+    @property
+    def _tail(self):
+        return self._control[1]
+
+    @_tail.setter
+    def _tail(self, value):
+        self._control[1] = value
+
+    def _grow(self):
+        raise BufferError('Packet ring is full')
+
+    def free(self):
+        return self._mask + 1 - (self._tail - self._head)
+
+    def close(self):
+        self._control.release()
+        self._words.release()
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
 
 
 class NetworkComputer(object):
-    def __init__(self, addr, program, network):
+    IdlePolls = 2
+    Stride = 256
+
+    def __init__(self, addr, program, network, wake=None, subnet=None,
+                 computer=Computer):
         self._addr = addr
-        self._computer = Computer(program, self._processInput, self._output)
+        self._wake = wake
+        self._base = addr - addr % NetworkComputer.Stride if subnet else 0
+        self._subnet = subnet
+        self._computer = computer(program, self._processInput, self._output)
         self._network = network
-        self._processing = None
-        self._write_buffer = []
+        self._buffer = self.net_buffer(addr)
+        self._packet = [0, 0, 0]
+        self._written = 0
         self._inputMode = 0
+        self._idle = 0
+        self._sent = False
+        self._packets = 0
 
     def _input(self):
-        return self._addr
+        return self._addr - self._base
 
     def _input2(self):
-        value = self._processing
-        self._processing = None
-        if value:
-            return value
-        if self.net_buffer(self._addr):
-            x, y = self.net_buffer(self._addr).popleft()
-            self._processing = y
-            return x
+        if self._sent:
+            self._sent = False
+            return None
+        if self._buffer:
+            self._idle = 0
+            return self._buffer.read()
+        if self._wake is not None and self.idle():
+            return None
+        self._idle += 1
         return -1
 
     def _processInput(self):
@@ -35,76 +164,372 @@ class NetworkComputer(object):
         return self._input()
 
     def _output(self, value):
-        self._write_buffer.append(value)
-        if len(self._write_buffer) == 3:
-            addr, x, y = self._write_buffer
-            self._write_buffer = []
-            self.net_buffer(addr).append((x, y))
+        self._idle = 0
+        packet = self._packet
+        packet[self._written] = value
+        self._written += 1
+        if self._written == 3:
+            self._written = 0
+            addr = packet[0]
+            if self._subnet and 0 <= addr < self._subnet:
+                addr += self._base
+            self.net_buffer(addr).push(packet[1], packet[2])
+            self._packets += 1
+            if self._wake is not None:
+                self._sent = True
+                self._wake(addr)
 
     def net_buffer(self, addr):
         if addr not in self._network:
-            self._network[addr] = deque()
+            self._network[addr] = PacketRing()
         return self._network[addr]
 
+    def addr(self):
+        return self._addr
+
+    def counter(self):
+        return self._computer.counter()
+
+    def packets(self):
+        return self._packets
+
     def step(self):
         return self._computer.step()
 
+    def run(self):
+        return self._computer.run()
+
     def stopped(self):
         return self._computer.stopped()
 
+    def idle(self):
+        return self._idle >= NetworkComputer.IdlePolls
+
+    def waiting(self):
+        return self.idle() and not self._buffer
+
+
+class Network(object):
+    def __init__(self, program, addresses, subnet=None, computer=Computer):
+        self._network = {}
+        self._computers = {n: NetworkComputer(n, program, self._network,
+                                              self._wake, subnet, computer)
+                           for n in addresses}
+        self._ready = deque(self._computers.values())
+        self._queued = set(self._computers)
+
+    def _wake(self, addr):
+        if addr in self._computers and addr not in self._queued:
+            self._queued.add(addr)
+            self._ready.append(self._computers[addr])
+
+    def buffer(self, addr):
+        if addr not in self._network:
+            self._network[addr] = PacketRing()
+        return self._network[addr]
+
+    def send(self, addr, x, y):
+        self.buffer(addr).push(x, y)
+        self._wake(addr)
+
+    def step(self):
+        if not self._ready:
+            return False
+        comp = self._ready.popleft()
+        self._queued.discard(comp.addr())
+        if self._run(comp) is Status.BLOCKED and not comp.waiting():
+            self._wake(comp.addr())
+        return True
+
+    def _run(self, comp):
+        return comp.run()
+
+    def run(self):
+        while self.step():
+            pass
+
+    def outbound(self):
+        packets = []
+        for addr, buffer in self._network.items():
+            if addr not in self._computers and buffer:
+                packets.extend((addr, x, y) for x, y in buffer)
+                buffer.clear()
+        return packets
+
+    def close(self):
+        pass
+
+
+class BenchmarkNetwork(Network):
+    def __init__(self, program, addresses, subnet=None, computer=Computer):
+        super().__init__(program, addresses, subnet, computer)
+        self.runs = 0
+        self.packets = 0
+        self.instructions = 0
+        self.run_time = 0.0
+
+    def send(self, addr, x, y):
+        self.packets += 1
+        super().send(addr, x, y)
+
+    def _run(self, comp):
+        counter = comp.counter()
+        packets = comp.packets()
+        start = perf_counter()
+        status = comp.run()
+        self.run_time += perf_counter() - start
+        self.runs += 1
+        self.instructions += comp.counter() - counter
+        self.packets += comp.packets() - packets
+        return status
 
-def part1(file):
-    N = 50
+    def computers(self):
+        return list(self._computers.values())
+
+
+def pack_packets(ring, packets):
+    if ring is None:
+        return packets
+    count = min(len(packets), ring.free() // 3)
+    for n in range(count):
+        addr, x, y = packets[n]
+        ring.write(addr)
+        ring.write(x)
+        ring.write(y)
+    return count, packets[count:]
+
+
+def unpack_packets(ring, message):
+    if ring is None:
+        yield from message
+        return
+    count, packets = message
+    for _ in range(count):
+        yield ring.read(), ring.read(), ring.read()
+    yield from packets
+
+
+def shard_worker(connection, program, addresses, subnet, rings=None):
+    network = Network(program, addresses, subnet)
+    inbound, outbound = rings or (None, None)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        try:
+            for addr, x, y in unpack_packets(inbound, message):
+                network.send(addr, x, y)
+            network.run()
+        except (ValueError, IndexError) as e:
+            connection.send(e)
+            break
+        connection.send(pack_packets(outbound, network.outbound()))
+    connection.close()
+
+
+class ShardedNetwork(object):
+    def __init__(self, program, addresses, shards, subnet=None,
+                 shared=False):
+        addresses = list(addresses)
+        chunk = -(-len(addresses) // shards)
+        self._owner = {}
+        self._external = {}
+        self._connections = []
+        self._workers = []
+        self._rings = []
+        for start in range(0, len(addresses), chunk):
+            shard = addresses[start:start + chunk]
+            self._owner.update((addr, len(self._workers)) for addr in shard)
+            rings = None
+            if shared:
+                rings = (SharedPacketRing(), SharedPacketRing())
+            self._rings.append(rings or (None, None))
+            parent, child = Pipe()
+            worker = Process(target=shard_worker,
+                             args=(child, program, shard, subnet, rings),
+                             daemon=True)
+            worker.start()
+            child.close()
+            self._connections.append(parent)
+            self._workers.append(worker)
+        self._inbound = [[] for _ in self._connections]
+        self._started = False
+
+    def buffer(self, addr):
+        if addr not in self._external:
+            self._external[addr] = PacketRing()
+        return self._external[addr]
+
+    def send(self, addr, x, y):
+        if addr in self._owner:
+            self._inbound[self._owner[addr]].append((addr, x, y))
+        else:
+            self.buffer(addr).push(x, y)
+
+    def step(self):
+        active = [n for n, packets in enumerate(self._inbound)
+                  if packets or not self._started]
+        if not active:
+            return False
+        for n in active:
+            inbound, _ = self._rings[n]
+            self._connections[n].send(pack_packets(inbound,
+                                                   self._inbound[n]))
+        self._inbound = [[] for _ in self._connections]
+        self._started = True
+        for n in active:
+            message = self._connections[n].recv()
+            if isinstance(message, Exception):
+                raise message
+            _, outbound = self._rings[n]
+            for addr, x, y in unpack_packets(outbound, message):
+                self.send(addr, x, y)
+        return True
+
+    def run(self):
+        while self.step():
+            pass
+
+    def close(self):
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except BrokenPipeError:
+                pass
+            connection.close()
+        for worker in self._workers:
+            worker.join()
+        for rings in self._rings:
+            for ring in rings:
+                if ring is not None:
+                    ring.close()
+
+
+def network_addresses(size, subnet=None):
+    if not subnet:
+        return range(size)
+    stride = NetworkComputer.Stride
+    return [n // subnet * stride + n % subnet for n in range(size)]
+
+
+def make_network(program, size, shards=1, subnet=None, shared=False):
+    addresses = network_addresses(size, subnet)
+    if shards > 1:
+        return ShardedNetwork(program, addresses, shards, subnet, shared)
+    return Network(program, addresses, subnet)
+
+
+def part1(file, size=50, shards=1, subnet=50, shared=False):
     program = parse_program(file)
-    network = {}
-    computers = [NetworkComputer(n, program, network) for n in range(N)]
-    target = 255
-    while target not in network:
-        for comp in computers:
-            if comp.stopped():
-                continue
-            comp.step()
-    x, y = network[target].popleft()
+    network = make_network(program, size, shards, subnet, shared)
+    try:
+        target = network.buffer(255)
+        while not target and network.step():
+            pass
+    finally:
+        network.close()
+    x, y = target.popleft()
     print(f"Answer: {y}")
 
 
-def part2(file):
-    N = 50
-    nat = 255
-    network = {}
-    network[nat] = deque()
+def part2(file, size=50, shards=1, subnet=50, shared=False):
     program = parse_program(file)
-    computers = [NetworkComputer(n, program, network) for n in range(N)]
-    idle_loop_count = 1000
-    idle_counter = 0
-    instr_count = 0
+    network = make_network(program, size, shards, subnet, shared)
+    nat = network.buffer(255)
     answer = []
-    while computers:
-        if all(not network[n] if n in network else True for n in range(N)):
-            idle_counter += 1
-        else:
-            idle_counter = 0
-
-        if idle_counter >= idle_loop_count and network[nat]:
-            idle_counter = 0
-            x, y = network[nat].pop()
-            network[nat].clear()
-            network[0].append((x, y))
+    try:
+        while True:
+            network.run()
+            if not nat:
+                break
+            x, y = nat.pop()
+            nat.clear()
+            network.send(0, x, y)
             if answer and answer[-1] == y:
                 break
             answer.append(y)
-
-        instr_count += 1
-        for comp in computers:
-            if comp.stopped():
-                computers = filter(lambda c: not c.stopped(), computers)
-                continue
-            comp.step()
+    finally:
+        network.close()
 
     answer = answer[-1]
     print(f"Answer: {answer}")
 
 
+Engines = {
+    'computer': Computer,
+    'compiled': CompiledComputer,
+}
+
+
+def bench_round(network, exhausted):
+    nat = network.buffer(255)
+    wakeups = 0
+    while not exhausted(network):
+        if network.step():
+            continue
+        if not nat:
+            return wakeups, True
+        x, y = nat.pop()
+        nat.clear()
+        network.send(0, x, y)
+        wakeups += 1
+    return wakeups, False
+
+
+def benchmark(file, nodes=50, packets=100000, instructions=None,
+              subnet=50, computer=Computer):
+    program = parse_program(file)
+    addresses = network_addresses(nodes, subnet)
+    counters = dict.fromkeys(addresses, 0)
+    rounds = settled = wakeups = runs = 0
+    sent = executed = 0
+    elapsed = run_time = 0.0
+
+    def exhausted(network):
+        if packets is not None and sent + network.packets >= packets:
+            return True
+        return (instructions is not None and
+                executed + network.instructions >= instructions)
+
+    # The network settles once the NAT stops getting packets, so keep
+    # booting fresh networks until the budget is spent.
+    while True:
+        network = BenchmarkNetwork(program, addresses, subnet, computer)
+        start = perf_counter()
+        woken, idle = bench_round(network, exhausted)
+        elapsed += perf_counter() - start
+        rounds += 1
+        settled += idle
+        wakeups += woken
+        runs += network.runs
+        sent += network.packets
+        executed += network.instructions
+        run_time += network.run_time
+        for comp in network.computers():
+            counters[comp.addr()] += comp.counter()
+        if not idle or (packets is None and instructions is None):
+            break
+
+    rates = [count / elapsed for count in counters.values()]
+    schedule_time = elapsed - run_time
+    rows = []
+    rows.append(f"Engine: {computer.__name__}")
+    rows.append(f"Nodes: {nodes}")
+    rows.append(f"Rounds: {rounds} ({settled} ran until the network settled)")
+    rows.append(f"Elapsed: {elapsed:.6f}s")
+    rows.append(f"Instructions: {executed} ({executed / elapsed:.0f}/s)")
+    rows.append(f"Instructions/s per NIC: min {min(rates):.0f}, "
+                f"mean {sum(rates) / len(rates):.0f}, max {max(rates):.0f}")
+    rows.append(f"Packets: {sent} ({sent / elapsed:.0f}/s)")
+    rows.append(f"NAT wake-ups: {wakeups}")
+    rows.append(f"Scheduler runs: {runs}")
+    rows.append(f"Interpret time: {run_time:.6f}s "
+                f"({100 * run_time / elapsed:.1f}%)")
+    rows.append(f"Scheduling time: {schedule_time:.6f}s "
+                f"({100 * schedule_time / elapsed:.1f}%)")
+    print('\n'.join(rows))
+
+
 def main(part, file):
     if file.isatty():
         print("Awaiting input from stdin...")
@@ -115,9 +540,38 @@ def main(part, file):
         part2(file)
 
 
+def bench_main(args):
+    if (len(args) > 4 or not all(arg.isdigit() for arg in args[1:3]) or
+            (len(args) == 4 and args[3] not in Engines)):
+        print(f"usage: {sys.argv[0]} bench [filename] [nodes] [packets] "
+              f"[{'|'.join(Engines)}]")
+        print(f"")
+        exit(1)
+
+    input_file = sys.stdin
+    if args:
+        try:
+            input_file = open(args[0])
+        except FileNotFoundError as e:
+            print(e)
+            exit(1)
+
+    nodes = int(args[1], 10) if len(args) > 1 else 50
+    packets = int(args[2], 10) if len(args) > 2 else 100000
+    computer = Engines[args[3]] if len(args) > 3 else Computer
+    with input_file:
+        benchmark(input_file, nodes, packets, computer=computer)
+
+
 if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "bench":
+        bench_main(sys.argv[2:])
+        exit(0)
+
     if (len(sys.argv) < 2 or len(sys.argv) > 3 or (sys.argv[1] != "1" and sys.argv[1] != "2")):
         print(f"usage: {sys.argv[0]} part [filename]")
+        print(f"       {sys.argv[0]} bench [filename] [nodes] [packets] "
+              f"[{'|'.join(Engines)}]")
         print(f"")
         exit(1)
 
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+import sys
+
+
+class FrameBuffer(object):
+    MinGrowth = 16
+
+    def __init__(self, width=0, height=0, fill=' ', origin=(0, 0),
+                 border=True):
+        self._fill = fill
+        self._border = border
+        self._x, self._y = origin
+        self._width = width
+        self._height = height
+        self._cells = [fill] * (width * height)
+        self._flags = bytearray(width * height)
+        self._dirty = []
+        self._bounds = None
+        self._drawn = None
+        self._status = ''
+        self._status_dirty = False
+
+    def bounds(self):
+        return self._bounds
+
+    def _grow(self, x, y):
+        (min_x, min_y), (max_x, max_y) = (
+            (self._x, self._y),
+            (self._x + self._width - 1, self._y + self._height - 1))
+        margin_x = max(FrameBuffer.MinGrowth, self._width)
+        margin_y = max(FrameBuffer.MinGrowth, self._height)
+        if x < min_x:
+            min_x = x - margin_x
+        elif x > max_x:
+            max_x = x + margin_x
+        if y < min_y:
+            min_y = y - margin_y
+        elif y > max_y:
+            max_y = y + margin_y
+        if not self._width or not self._height:
+            min_x, max_x = min(min_x, x), max(max_x, x)
+            min_y, max_y = min(min_y, y), max(max_y, y)
+
+        width = max_x - min_x + 1
+        height = max_y - min_y + 1
+        cells = [self._fill] * (width * height)
+        for row in range(self._height):
+            start = (row + self._y - min_y) * width + self._x - min_x
+            cells[start:start + self._width] = (
+                self._cells[row * self._width:(row + 1) * self._width])
+        self._cells = cells
+        self._flags = bytearray(width * height)
+        self._dirty = []
+        self._x, self._y = min_x, min_y
+        self._width, self._height = width, height
+        self._drawn = None
+
+    def get(self, x, y):
+        col = x - self._x
+        row = y - self._y
+        if 0 <= col < self._width and 0 <= row < self._height:
+            return self._cells[row * self._width + col]
+        return self._fill
+
+    def set(self, x, y, char):
+        col = x - self._x
+        row = y - self._y
+        if not (0 <= col < self._width and 0 <= row < self._height):
+            self._grow(x, y)
+            col = x - self._x
+            row = y - self._y
+
+        bounds = self._bounds
+        if bounds is None:
+            self._bounds = ((x, y), (x, y))
+        else:
+            (min_x, min_y), (max_x, max_y) = bounds
+            if not (min_x <= x <= max_x and min_y <= y <= max_y):
+                self._bounds = ((min(min_x, x), min(min_y, y)),
+                                (max(max_x, x), max(max_y, y)))
+
+        index = row * self._width + col
+        if self._cells[index] == char:
+            return
+        self._cells[index] = char
+        if not self._flags[index]:
+            self._flags[index] = 1
+            self._dirty.append(index)
+
+    def status(self, text):
+        if text != self._status:
+            self._status = text
+            self._status_dirty = True
+
+    def _row(self, y, min_x, max_x):
+        row = y - self._y
+        if not 0 <= row < self._height:
+            return self._fill * (max_x - min_x + 1)
+        start = max(min_x, self._x)
+        end = min(max_x, self._x + self._width - 1)
+        if start > end:
+            return self._fill * (max_x - min_x + 1)
+        offset = row * self._width - self._x
+        return (self._fill * (start - min_x) +
+                ''.join(self._cells[offset + start:offset + end + 1]) +
+                self._fill * (max_x - end))
+
+    def text(self, bounds=None, border=None):
+        bounds = bounds or self._bounds
+        border = self._border if border is None else border
+        if bounds is None:
+            return ''
+        (min_x, min_y), (max_x, max_y) = bounds
+        rows = []
+        if border:
+            rows.append('╔' + '═' * (max_x - min_x + 1) + '╗')
+        for y in range(min_y, max_y + 1):
+            row = self._row(y, min_x, max_x)
+            rows.append('║' + row + '║' if border else row)
+        if border:
+            rows.append('╚' + '═' * (max_x - min_x + 1) + '╝')
+        return '\n'.join(rows)
+
+    def _clear_dirty(self):
+        flags = self._flags
+        for index in self._dirty:
+            flags[index] = 0
+        self._dirty = []
+
+    def render(self):
+        bounds = self._bounds
+        if bounds is None:
+            return ''
+        (min_x, min_y), (max_x, max_y) = bounds
+        inset = 2 if self._border else 1
+        status_row = max_y - min_y + inset + (1 if self._border else 0)
+
+        if self._drawn != bounds:
+            self._drawn = bounds
+            self._clear_dirty()
+            self._status_dirty = False
+            return (f"\x1b[2J\x1b[H{self.text()}\n{self._status}\n")
+
+        parts = []
+        width = self._width
+        cells = self._cells
+        run_start = run_end = None
+        for index in sorted(self._dirty):
+            if run_end is not None and index == run_end + 1 and (
+                    index % width):
+                run_end = index
+                continue
+            if run_start is not None:
+                parts.append(self._move(run_start, min_x, min_y, inset) +
+                             ''.join(cells[run_start:run_end + 1]))
+            run_start = run_end = index
+        if run_start is not None:
+            parts.append(self._move(run_start, min_x, min_y, inset) +
+                         ''.join(cells[run_start:run_end + 1]))
+        self._clear_dirty()
+
+        if self._status_dirty:
+            self._status_dirty = False
+            parts.append(f"\x1b[{status_row + 1};1H{self._status}\x1b[K")
+        if parts:
+            parts.append(f"\x1b[{status_row + 2};1H")
+        return ''.join(parts)
+
+    def _move(self, index, min_x, min_y, inset):
+        row = index // self._width + self._y - min_y
+        col = index % self._width + self._x - min_x
+        return f"\x1b[{row + inset};{col + inset}H"
+
+    def draw(self, stream=None):
+        output = self.render()
+        if output:
+            stream = stream or sys.stdout
+            stream.write(output)
+            stream.flush()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+
+class Grid(object):
+    MinGrowth = 8
+
+    def __init__(self, default=0, width=0, height=0, origin=(0, 0)):
+        self._default = default
+        self._x, self._y = origin
+        self._width = width
+        self._height = height
+        self._cells = bytearray([default]) * (width * height)
+        self._counts = [0] * 256
+        self._min_x = self._min_y = self._max_x = self._max_y = None
+
+    def _grow(self, x, y):
+        min_x, min_y = self._x, self._y
+        max_x = min_x + self._width - 1
+        max_y = min_y + self._height - 1
+        if not self._width or not self._height:
+            min_x, min_y, max_x, max_y = x, y, x, y
+        if x < min_x:
+            min_x = min(x, min_x - max(self._width, Grid.MinGrowth))
+        elif x > max_x:
+            max_x = max(x, max_x + max(self._width, Grid.MinGrowth))
+        if y < min_y:
+            min_y = min(y, min_y - max(self._height, Grid.MinGrowth))
+        elif y > max_y:
+            max_y = max(y, max_y + max(self._height, Grid.MinGrowth))
+
+        width = max_x - min_x + 1
+        height = max_y - min_y + 1
+        cells = bytearray([self._default]) * (width * height)
+        old = self._width
+        for row in range(self._height):
+            start = (row + self._y - min_y) * width + self._x - min_x
+            cells[start:start + old] = self._cells[row * old:(row + 1) * old]
+        self._cells = cells
+        self._x, self._y = min_x, min_y
+        self._width, self._height = width, height
+
+    def get(self, x, y):
+        col = x - self._x
+        row = y - self._y
+        if 0 <= col < self._width and 0 <= row < self._height:
+            return self._cells[row * self._width + col]
+        return self._default
+
+    def set(self, x, y, value):
+        col = x - self._x
+        row = y - self._y
+        if not (0 <= col < self._width and 0 <= row < self._height):
+            self._grow(x, y)
+            col = x - self._x
+            row = y - self._y
+
+        if self._min_x is None:
+            self._min_x = self._max_x = x
+            self._min_y = self._max_y = y
+        else:
+            if x < self._min_x:
+                self._min_x = x
+            elif x > self._max_x:
+                self._max_x = x
+            if y < self._min_y:
+                self._min_y = y
+            elif y > self._max_y:
+                self._max_y = y
+
+        index = row * self._width + col
+        counts = self._counts
+        counts[self._cells[index]] -= 1
+        counts[value] += 1
+        self._cells[index] = value
+
+    def include(self, x, y):
+        if self._min_x is None or not (
+                self._min_x <= x <= self._max_x and
+                self._min_y <= y <= self._max_y):
+            self.set(x, y, self.get(x, y))
+
+    def bounds(self):
+        if self._min_x is None:
+            return None
+        return ((self._min_x, self._min_y), (self._max_x, self._max_y))
+
+    def count(self, value):
+        if value != self._default:
+            return self._counts[value]
+        if self._min_x is None:
+            return 0
+        area = ((self._max_x - self._min_x + 1) *
+                (self._max_y - self._min_y + 1))
+        others = sum(self._counts) - self._counts[self._default]
+        return area - others
+
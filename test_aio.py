@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import asyncio
+from aio import AsyncComputer
+from compiler import CompiledComputer
+from computer import Status
+
+
+# Outputs the running sum of its inputs until it reads a zero.
+Summer = [3, 20, 1006, 20, 14, 1, 20, 21, 21, 4, 21, 1105, 1, 0, 99] + [0] * 7
+
+
+def test_sync_and_async_devices():
+    async def main():
+        queue = asyncio.Queue()
+        for value in (5, "-3", 10, 0):
+            queue.put_nowait(value)
+        plain = []
+        awaited = []
+
+        async def output(value):
+            await asyncio.sleep(0)
+            awaited.append(value)
+
+        statuses = await asyncio.gather(
+            AsyncComputer(Summer, queue.get, plain.append).run(),
+            AsyncComputer(Summer, iter([1, 2, 0]).__next__, output,
+                          computer=CompiledComputer).run())
+        return statuses, plain, awaited
+
+    statuses, plain, awaited = asyncio.run(main())
+    assert statuses == [Status.HALTED, Status.HALTED]
+    assert plain == [5, 2, 12]
+    assert awaited == [1, 3]
+
+
+def test_long_runs_yield_to_other_tasks(monkeypatch):
+    monkeypatch.setattr(AsyncComputer, "Slice", 100)
+    # Counts cell 12 up to 10000 before halting.
+    program = [1001, 12, 1, 12, 1007, 12, 10000, 13, 1005, 13, 0, 99, 0, 0]
+    ticks = []
+
+    async def ticker(done):
+        while not done.is_set():
+            ticks.append(len(ticks))
+            await asyncio.sleep(0)
+
+    async def main():
+        done = asyncio.Event()
+        task = asyncio.create_task(ticker(done))
+        computer = AsyncComputer(program, None, None)
+        await computer.run()
+        done.set()
+        await task
+        return computer.computer().get(12)
+
+    assert asyncio.run(main()) == 10000
+    assert len(ticks) > 100
+
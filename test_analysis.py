@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+from analysis import analyze
+from computer import Computer
+
+
+def test_conditional_jump_splits_blocks():
+    # in [20]; jt [20], 7; out 0; out 1; hlt
+    program = [3, 20, 1005, 20, 7, 104, 0, 104, 1, 99] + [0] * 11
+    analysis = analyze(program)
+    assert [block.start for block in analysis.blocks()] == [0, 5, 7]
+    assert analysis.edges() == [(0, 7), (0, 5), (5, 7)]
+    assert analysis.code_ranges() == [(0, 10)]
+    assert analysis.data_ranges() == [(10, 21)]
+
+
+def test_calls_and_returns():
+    # A call pushes its return address at rb+0 and jumps to a function
+    # that returns through it.
+    program = [109, 20, 21101, 9, 0, 0, 1105, 1, 10, 99, 104, 5, 2106, 0, 0]
+    analysis = analyze(program)
+    assert analysis.functions() == [10]
+    assert analysis.calls() == [(6, 10, 9)]
+    assert analysis.returns() == [12]
+    disassembly = analysis.disassembly()
+    assert "\nfn_10:\n  block_10:\n        10  out 5\n" in disassembly
+
+    outputs = []
+    Computer(program, output_device=outputs.append).run()
+    assert outputs == [5]
+
+
+def test_jump_table():
+    # The jump target is read from table[20 + input], which lists the
+    # two cases at 10 and 13.
+    program = ([3, 30, 101, 20, 30, 8, 105, 1, 0, 99, 104, 1, 99, 104, 2, 99] +
+               [0] * 4 + [10, 13, -1] + [0] * 8)
+    analysis = analyze(program)
+    assert analysis.indirect() == [6]
+    assert analysis.tables() == {6: (20, 22)}
+    assert analysis.edges() == [(0, 10), (0, 13)]
+    assert analysis.data_ranges() == [(9, 10), (16, 31)]
+    assert "Jump tables: 1" in analysis.summary()
+
+    for case, expected in ((0, 1), (1, 2)):
+        outputs = []
+        Computer(program, lambda: case, outputs.append).run()
+        assert outputs == [expected]
+
+
+def test_data_is_not_decoded():
+    # Code after an unconditional jump is only reached through the jump.
+    program = [1105, 1, 5, 1, 2, 104, 7, 99]
+    analysis = analyze(program)
+    operations = analysis.operations()
+    assert [operation.index for operation in operations] == [0, 5, 7]
+    assert analysis.data_ranges() == [(3, 5)]
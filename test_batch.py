@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+from batch import BatchComputer
+from computer import Computer, Status, parse_program
+
+
+def run_scalar(program, inputs):
+    outputs = []
+    computer = Computer(program, lambda: None, outputs.append)
+    for value in inputs:
+        computer.queue_input(value)
+    try:
+        status, error = computer.run(), None
+    except (ValueError, IndexError) as e:
+        status, error = Status.HALTED, e
+    return status, type(error), str(error), outputs, computer.counter()
+
+
+def run_batch(program, inputs):
+    batch = BatchComputer(program, len(inputs), inputs)
+    batch.run()
+    results = []
+    for lane in range(batch.lanes()):
+        error = batch.error(lane)
+        results.append((batch.status(lane), type(error), str(error),
+                        batch.outputs(lane), batch.counter(lane)))
+    return results
+
+
+def assert_lanes_match(program, inputs):
+    expected = [run_scalar(program, values) for values in inputs]
+    assert run_batch(program, inputs) == expected
+
+
+def load(day):
+    with open(f"day{day}.txt") as file:
+        return parse_program(file, cache=False)
+
+
+def test_day5_lanes_match_computer():
+    assert_lanes_match(load(5), [[1], [5], [8]])
+
+
+def test_day9_lanes_match_computer():
+    assert_lanes_match(load(9), [[1], []])
+
+
+def test_day19_lanes_match_computer():
+    assert_lanes_match(load(19), [[x, y] for x in range(0, 20, 3)
+                                  for y in range(0, 20, 4)])
+
+
+def test_bad_mode_raises_value_error():
+    program = [3, 0, 1005, 0, 6, 99, 104, 1, 99]
+    inputs = [[0], [1], []]
+    assert_lanes_match(program, inputs)
+    program = [3, 0, 1006, 0, 7, 99, 99, 304, 1, 99]
+    assert_lanes_match(program, inputs)
+    assert run_batch(program, [[0]])[0][1] is ValueError
+
+
+def test_spilled_lanes_agree_on_counts():
+    # A multiply that overflows int64 moves its lane to a scalar Computer.
+    program = [3, 20, 2, 20, 20, 21, 4, 21, 99]
+    assert_lanes_match(program, [[3], [1 << 40]])
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+import random
+from compiler import BlockBuilder, CompiledComputer
+from computer import Computer, Memory, PagedMemory, Status
+
+
+def test_cached_block_needs_loaded_cells():
+    long = [1, 12, 12, 13, 4, 13, 99, 0, 0, 0, 0, 0, 7, 0]
+    short = long[:7]
+    outputs = []
+    CompiledComputer(long, output_device=outputs.append).run()
+    CompiledComputer(short, output_device=outputs.append).run()
+    Computer(short, output_device=outputs.append).run()
+    assert outputs == [14, 0, 0]
+
+
+def outcome(engine, program, memory):
+    inputs = iter([3, -1, 7, 0, 12, 5] * 20)
+    outputs = []
+    computer = engine(program, lambda: next(inputs, None), outputs.append,
+                      memory)
+    try:
+        status, error = computer.run(max_steps=400), None
+    except (ValueError, IndexError) as e:
+        status, error = None, type(e)
+    return (status, error, outputs, computer.index(), computer.offset(),
+            computer.counter(), computer.data())
+
+
+def random_program(rng):
+    size = rng.randrange(8, 60)
+    program = []
+    for _ in range(size):
+        roll = rng.random()
+        if roll < 0.45:
+            modes = ''.join(rng.choice('0012') for _ in range(3))
+            op_code = rng.choice([1, 2, 3, 4, 5, 6, 7, 8, 9, 99])
+            program.append(int(f"{modes}{op_code:02}"))
+        elif roll < 0.9:
+            program.append(rng.randrange(-3, size + 4))
+        else:
+            program.append(rng.randrange(-50, 10000))
+    return program
+
+
+def assert_same(program):
+    for memory in (Memory, PagedMemory):
+        expected = outcome(Computer, program, memory)
+        actual = outcome(CompiledComputer, program, memory)
+        # The compiled engine only checks its step budget between blocks.
+        if Status.EXHAUSTED not in (expected[0], actual[0]):
+            assert actual == expected, program
+
+
+def test_untaken_jump_does_not_read_target():
+    assert_same([2106, 1, -20, 104, 5, 99])
+    assert_same([2106, 1, 9936, 104, 5, 99])
+
+
+def test_loads_keep_interpreter_order():
+    assert_same([12008, -1, 11007, 1001, 1003, 0, 99])
+
+
+def test_self_modifying_blocks():
+    # The first add rewrites the opcode of the instruction after it.
+    assert_same([1101, 1, 0, 4, 1, 0, 0, 10, 104, 7, 99])
+    assert_same([1101, 100, -1, 7, 1002, 7, 2, 3, 104, 1, 99])
+
+
+def test_jump_to_own_address_stops_like_interpreter():
+    for program in ([1101, 0, 0, 14, 1105, 1, 4, 99], [1105, 1, 0, 99]):
+        expected = outcome(Computer, program, Memory)
+        assert expected[0] is Status.BLOCKED
+        assert outcome(CompiledComputer, program, Memory) == expected
+
+
+def test_matches_interpreter_on_random_programs():
+    rng = random.Random(2019)
+    for _ in range(500):
+        assert_same(random_program(rng))
+
+
+def test_step_budget_overshoots_by_at_most_one_block():
+    program = [1101, 0, 0, 20, 1001, 20, 1, 20, 1008, 20, 500, 21, 1006, 21,
+               4, 4, 20, 99]
+    for budget in (1, 2, 5, 50):
+        computer = CompiledComputer(program, output_device=lambda value: None)
+        assert computer.run(max_steps=budget) is Status.EXHAUSTED
+        assert budget <= computer.counter() < budget + BlockBuilder.MaxLength
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+
+import io
+import json
+from compiler import CompiledComputer
+from computer import (CacheMax, CacheMin, Computer, Event, OpCode, PagedMemory,
+                      Replayer, Status, cache_path, dump_program,
+                      load_program, no_input, no_output, parse_program,
+                      read_trace, run_job, run_many)
+
+
+Quine = [109, 1, 204, -1, 1001, 100, 1, 100, 1008, 100, 16, 101, 1006, 101,
+         0, 99]
+
+
+def test_fork_of_profiled_computer_runs_independently():
+    outputs = []
+    computer = Computer(Quine, output_device=outputs.append)
+    computer.profile(stream=None)
+    computer.run(max_steps=10)
+    counter = computer.counter()
+
+    fork = computer.fork()
+    assert fork.profiler() is None
+    assert fork.run(max_steps=5) is Status.EXHAUSTED
+    assert fork.counter() == counter + 5
+    assert computer.counter() == counter
+    assert fork.run() is Status.HALTED
+    assert outputs == Quine
+
+
+def test_profiling_keeps_instruction_count():
+    plain = Computer(Quine, output_device=lambda value: None)
+    plain.run()
+    profiled = Computer(Quine, output_device=lambda value: None)
+    profiler = profiled.profile(stream=None)
+    profiled.run()
+    assert profiled.counter() == plain.counter()
+    assert sum(profiler.opcodes.values()) == plain.counter() - 1
+
+
+def test_load_program_rejects_truncated_cache():
+    program = [1, 2, 3, 99]
+    data = dump_program(program)
+    assert load_program(data) == program
+    assert load_program(dump_program([1 << 70, 99])) == [1 << 70, 99]
+    for bad in (data[:-8], data + b'\0', dump_program([1 << 70])[:-1]):
+        try:
+            load_program(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"loaded a corrupt cache of {len(bad)} bytes")
+
+
+def test_jump_to_own_address_keeps_running():
+    program = [109, 20, 109, 1, 1205, 0, 2, 204, -1, 99] + [0] * 10 + [
+        0, 5, 6, 7, 8, 0]
+    outputs = []
+    computer = Computer(program, output_device=outputs.append)
+    assert computer.run() is Status.HALTED
+    assert outputs == [8]
+
+
+def test_step_budget_is_exact():
+    for budget in (1, 2, 3, 7, Computer.Slice + 5):
+        computer = Computer(Quine, output_device=lambda value: None)
+        status = computer.run(max_steps=budget)
+        if status is Status.EXHAUSTED:
+            assert computer.counter() == budget
+        else:
+            assert computer.counter() <= budget
+
+
+def test_budget_resumes_where_it_stopped():
+    outputs = []
+    computer = Computer(Quine, output_device=outputs.append)
+    while computer.run(max_steps=3) is Status.EXHAUSTED:
+        assert computer.counter() % 3 == 0
+    assert outputs == Quine
+
+
+def test_fork_isolates_memory_and_decode_cache():
+    # Outputs the immediate in cell 1; the parent also rewrites its
+    # decoded opcode cell, which must not touch the child.
+    program = [104, 1, 99, 0]
+    parent = Computer(program, no_input, lambda value: None)
+    parent.instruction(0)
+    outputs = []
+    child = parent.fork(output_device=outputs.append)
+    assert child._decoded is parent._decoded
+
+    parent.set(0, 104)
+    parent.set(1, 5)
+    child.set(1, 2)
+    assert child._decoded is not parent._decoded
+    assert parent.get(1) == 5
+    child.run()
+    assert outputs == [2]
+
+
+def test_restore_does_not_see_later_writes():
+    outputs = []
+    computer = Computer([104, 1, 99], no_input, outputs.append)
+    snapshot = computer.snapshot()
+    computer.run()
+    computer.set(1, 7)
+    computer.restore(snapshot)
+    computer.run()
+    computer.restore(snapshot)
+    computer.run()
+    assert outputs == [1, 1, 1]
+
+
+def test_paged_fork_shares_untouched_pages():
+    program = [1101, 1, 2, 5000, 99] + [0] * (3 * PagedMemory.PageSize)
+    parent = Computer(program, no_input, lambda value: None,
+                      memory=PagedMemory)
+    child = parent.fork()
+    child.run()
+    assert child.get(5000) == 3
+    assert parent.get(5000) == 0
+    shared = [number for number, page in child._memory._pages.items()
+              if parent._memory._pages.get(number) is page]
+    assert shared and 5000 >> PagedMemory.PageBits not in shared
+
+
+def test_decoded_instructions_are_cached_until_written():
+    computer = Computer([104, 7, 99], no_input, lambda value: None)
+    instruction = computer.instruction(0)
+    assert computer.instruction(0) is instruction
+    computer.set(0, 4)
+    assert computer.instruction(0) is not instruction
+    assert computer.instruction(0).modes != instruction.modes
+
+
+def test_rewritten_opcode_runs_new_instruction():
+    # Outputs 7, turns its own first instruction into HALT and jumps back.
+    program = [104, 7, 1101, 0, 99, 0, 1105, 1, 0]
+    outputs = []
+    computer = Computer(program, no_input, outputs.append)
+    assert computer.run() is Status.HALTED
+    assert outputs == [7]
+
+
+def test_run_until_io_stops_at_each_io():
+    # Doubles its inputs for as long as cell 14 is non-zero.
+    program = [3, 13, 1002, 13, 2, 13, 4, 13, 1005, 14, 0, 99, 0, 0, 1]
+    for engine in (Computer, CompiledComputer):
+        computer = engine(program)
+        assert computer.run_until_io() == (Status.BLOCKED, None)
+        computer.queue_input(21)
+        assert computer.pending_input() == 1
+        assert computer.run_until_io() == (Status.OUTPUT, 42)
+        assert computer.run_until_io() == (Status.BLOCKED, None)
+        computer.queue_input(5)
+        assert computer.run_until_io() == (Status.OUTPUT, 10)
+        computer.set(14, 0)
+        assert computer.run_until_io() == (Status.HALTED, None)
+        assert computer.run_until_io() == (Status.HALTED, None)
+
+
+def test_queued_input_is_used_before_the_device():
+    outputs = []
+    computer = Computer([3, 9, 4, 9, 3, 9, 4, 9, 99, 0], lambda: 7,
+                        outputs.append)
+    computer.queue_input(1)
+    assert computer.run() is Status.HALTED
+    assert outputs == [1, 7]
+
+
+def test_snapshot_keeps_queued_input():
+    computer = Computer([3, 5, 4, 5, 99, 0])
+    computer.queue_input(3)
+    snapshot = computer.snapshot()
+    assert computer.run_until_io() == (Status.OUTPUT, 3)
+    computer.restore(snapshot)
+    assert computer.pending_input() == 1
+    assert computer.run_until_io() == (Status.OUTPUT, 3)
+
+
+def test_run_many_matches_serial_runs():
+    # Outputs its input times cell 12.
+    program = [3, 11, 2, 11, 12, 11, 4, 11, 99, 0, 0, 0, 1]
+    jobs = [[n] for n in range(40)]
+    patches = [{12: n % 4} for n in range(40)]
+    results = run_many(program, jobs, workers=2, patches=patches, chunk=8,
+                       read=(12,))
+    expected = [run_job(program, job, patch, read=(12,))
+                for job, patch in zip(jobs, patches)]
+    assert [r.outputs for r in results] == [r.outputs for r in expected]
+    assert [r.cells for r in results] == [[n % 4] for n in range(40)]
+    assert results[5].outputs == [5]
+
+
+def test_run_many_stops_at_until():
+    program = [3, 7, 4, 7, 99, 0, 0, 0]
+    results = run_many(program, [[n] for n in range(1000)], workers=1,
+                       chunk=1, until=lambda result: result.outputs == [3])
+    assert [r.outputs for r in results] == [[0], [1], [2], [3]]
+
+
+def test_run_many_reports_errors_per_job():
+    # Jumps to an invalid opcode on a non-zero input.
+    program = [3, 9, 1005, 9, 7, 99, 0, 42, 99, 0]
+    results = run_many(program, [[0], [1]], workers=1)
+    assert results[0].error is None
+    assert isinstance(results[1].error, ValueError)
+
+
+def test_profiler_counts_opcodes_and_addresses(tmp_path):
+    stream = io.StringIO()
+    path = tmp_path / "profile.json"
+    computer = Computer(Quine, output_device=lambda value: None)
+    profiler = computer.profile(stream=stream, path=str(path))
+    computer.run()
+    assert profiler.opcodes[OpCode.OUTPUT] == len(Quine)
+    assert profiler.opcodes[OpCode.ADD] == len(Quine)
+    assert profiler.addresses == {index: len(Quine)
+                                  for index in (0, 2, 4, 8, 12)}
+    assert profiler.outputs == len(Quine)
+    assert profiler.high_water == 102
+
+    report = stream.getvalue()
+    assert report.startswith(f"Instructions: {computer.counter() - 1}\n")
+    assert "Hot addresses (top 10):" in report
+    summary = json.loads(path.read_text())
+    assert summary['opcodes']['OUTPUT'] == len(Quine)
+    assert summary['addresses']['12'] == len(Quine)
+
+
+def test_profiler_skips_blocked_input():
+    computer = Computer([3, 5, 4, 5, 99, 0], lambda: None)
+    profiler = computer.profile(stream=None)
+    assert computer.run() is Status.BLOCKED
+    assert profiler.inputs == 1
+    assert not profiler.opcodes
+    assert computer.counter() == 0
+
+
+def test_program_cache_round_trips_any_integer():
+    program = [0, -1, 99, CacheMin, CacheMax, CacheMax + 1, -(1 << 90)]
+    assert load_program(dump_program(program)) == program
+
+
+def test_parse_program_reuses_and_repairs_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr("computer.CacheDir", str(tmp_path))
+    source = "1,0,0,0,99\n"
+    assert parse_program(io.StringIO(source)) == [1, 0, 0, 0, 99]
+    path = cache_path(source.strip())
+    with open(path, 'rb') as cached:
+        assert load_program(cached.read()) == [1, 0, 0, 0, 99]
+
+    with open(path, 'wb') as cached:
+        cached.write(dump_program([2, 0, 0, 0, 99]))
+    assert parse_program(io.StringIO(source)) == [2, 0, 0, 0, 99]
+    assert parse_program(io.StringIO(source), cache=False) == [1, 0, 0, 0, 99]
+
+    with open(path, 'wb') as cached:
+        cached.write(b'garbage')
+    assert parse_program(io.StringIO(source)) == [1, 0, 0, 0, 99]
+    with open(path, 'rb') as cached:
+        assert load_program(cached.read()) == [1, 0, 0, 0, 99]
+
+
+# Outputs the running sum of its inputs until it reads a zero.
+Summer = [3, 20, 1006, 20, 14, 1, 20, 21, 21, 4, 21, 1105, 1, 0, 99] + [0] * 7
+
+
+def test_trace_records_io_events():
+    inputs = iter([5, -3, 10, 0])
+    outputs = []
+    stream = io.BytesIO()
+    computer = Computer(Summer, lambda: next(inputs), outputs.append)
+    tracer = computer.trace(stream)
+    computer.run()
+    assert outputs == [5, 2, 12]
+    assert tracer.events == 7
+
+    events = list(read_trace(stream.getvalue()))
+    assert [(event, value) for event, _, value in events] == [
+        (Event.INPUT, 5), (Event.OUTPUT, 5), (Event.INPUT, -3),
+        (Event.OUTPUT, 2), (Event.INPUT, 10), (Event.OUTPUT, 12),
+        (Event.INPUT, 0)]
+    counters = [counter for _, counter, _ in events]
+    assert counters == sorted(counters)
+    assert counters[-1] < computer.counter()
+
+
+def test_replay_forks_match_the_recorded_run():
+    inputs = iter([5, -3, 10, 0])
+    stream = io.BytesIO()
+    computer = Computer(Summer, lambda: next(inputs), no_output)
+    computer.trace(stream)
+    computer.run()
+
+    replayer = Replayer(Summer, stream.getvalue(), keyframe=2)
+    assert len(replayer) == 7
+    for number, remaining, expected in ((3, [10, 0], [2, 12]),
+                                        (1, [-3, 10, 0], [5, 2, 12]),
+                                        (7, [], [])):
+        outputs = []
+        fork = replayer.seek(number, iter(remaining).__next__, outputs.append)
+        assert fork.run() is Status.HALTED
+        assert outputs == expected
+
+
+def test_replay_detects_divergence():
+    inputs = iter([5, 0])
+    stream = io.BytesIO()
+    computer = Computer(Summer, lambda: next(inputs), no_output)
+    computer.trace(stream)
+    computer.run()
+
+    changed = Summer[:]
+    changed[21] = 1
+    replayer = Replayer(changed, stream.getvalue())
+    replayer.seek(1)
+    try:
+        replayer.seek(2)
+    except ValueError as e:
+        assert "diverges at event 1" in str(e)
+    else:
+        raise AssertionError("replayed a diverging trace")
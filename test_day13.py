@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+import io
+from contextlib import redirect_stdout
+from computer import parse_program
+from day13 import ArcadeCabinet, part2, play, score_cabinets
+
+
+def load():
+    with open("day13.txt") as file:
+        return parse_program(file)
+
+
+def test_every_mode_clears_the_board():
+    program = load()
+    counts = {}
+    for mode in ArcadeCabinet.Mode:
+        game = ArcadeCabinet(program, 0, mode)
+        game.insertQuarters(2)
+        game.run()
+        assert game.score() == 11991
+        assert game.countTiles(ArcadeCabinet.Tile.BLOCK) == 0
+        counts[mode] = game.instructions()
+    assert (counts[ArcadeCabinet.Mode.WALL] <
+            counts[ArcadeCabinet.Mode.FOLLOW])
+
+
+def test_score_cabinets_matches_play():
+    program = load()
+    assert play(program) == 11991
+    assert score_cabinets([program] * 3, workers=2) == [11991] * 3
+
+
+def test_headless_part2_reports_frames():
+    output = io.StringIO()
+    with open("day13.txt") as file, redirect_stdout(output):
+        part2(file, render_every=0)
+    lines = output.getvalue().splitlines()
+    assert lines[0].startswith("Frames: ")
+    assert lines[-1] == "Final Score: 11991"
+
+
+def cabinet(*tiles):
+    game = ArcadeCabinet([99], 0)
+    for x, y, tile in tiles:
+        for value in (x, y, tile.value):
+            game._processOutput(value)
+    return game
+
+
+def test_predict_landing_follows_wall_bounces():
+    Tile = ArcadeCabinet.Tile
+    walls = [(x, 0, Tile.WALL) for x in range(11)]
+    walls += [(x, y, Tile.WALL) for x in (0, 10) for y in range(1, 21)]
+    for start in range(1, 10):
+        for dx in (-1, 1):
+            game = cabinet(*walls, (5, 20, Tile.HOR_PADDLE),
+                           (start - dx, 4, Tile.BALL), (start, 5, Tile.BALL))
+            x, step = start, dx
+            for _ in range(19 - 5):
+                x += step
+                if not 1 <= x <= 9:
+                    step = -step
+                    x += 2 * step
+            assert game.predictLanding() == x
+
+
+def test_predict_landing_waits_for_a_falling_ball():
+    Tile = ArcadeCabinet.Tile
+    paddle = (5, 20, Tile.HOR_PADDLE)
+    walls = [(0, 0, Tile.WALL), (10, 0, Tile.WALL)]
+    assert cabinet(*walls, paddle, (3, 5, Tile.BALL)).predictLanding() == 3
+    rising = cabinet(*walls, paddle, (2, 6, Tile.BALL), (3, 5, Tile.BALL))
+    assert rising.predictLanding() == 3
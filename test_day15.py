@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+from collections import deque
+from computer import Memory, PagedMemory, parse_program
+from day15 import Block, RepairDroid
+
+
+def load():
+    with open("day15.txt") as file:
+        return parse_program(file)
+
+
+def cells(droid):
+    (min_x, min_y), (max_x, max_y) = droid.bounds()
+    return {(x, y): droid._blocks.get(x, y)
+            for x in range(min_x, max_x + 1)
+            for y in range(min_y, max_y + 1)}
+
+
+def test_explore_finds_the_same_maze_as_walking():
+    program = load()
+    walker = RepairDroid(program)
+    walker.map()
+    for memory in (Memory, PagedMemory):
+        droid = RepairDroid(program, memory)
+        assert droid.explore() == walker.target()
+        assert cells(droid) == cells(walker)
+
+
+def test_explore_records_shortest_distances():
+    droid = RepairDroid(load())
+    droid.explore()
+    distance = {(0, 0): 0}
+    queue = deque([(0, 0)])
+    while queue:
+        pos = queue.popleft()
+        for next_pos in droid.neighbours(pos):
+            if next_pos in distance or droid.block(next_pos) is Block.WALL:
+                continue
+            distance[next_pos] = distance[pos] + 1
+            queue.append(next_pos)
+    assert all(droid.distance(pos) == steps for pos, steps in distance.items())
+    assert droid.distance(droid.target()) == 354
+
+
+def test_explore_can_stop_at_the_target():
+    full = RepairDroid(load())
+    full.explore()
+    early = RepairDroid(load())
+    assert early.explore(stop_at_target=True) == full.target()
+    assert early.distance(early.target()) == 354
+    known = [value for value in cells(early).values()
+             if value != RepairDroid.Unknown]
+    assert len(known) < len(cells(full))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+import io
+import pickle
+from contextlib import redirect_stdout
+from computer import Status, parse_program
+from day23 import (BenchmarkNetwork, Network, NetworkComputer, PacketRing,
+                   ShardedNetwork, SharedPacketRing, benchmark,
+                   pack_packets, part1, part2, unpack_packets)
+
+
+def load():
+    with open("day23.txt") as file:
+        return parse_program(file)
+
+
+def test_benchmark_counts_only_sent_packets(monkeypatch):
+    pushes = []
+    push = PacketRing.push
+
+    def counted(ring, x, y):
+        pushes.append(x)
+        return push(ring, x, y)
+
+    monkeypatch.setattr(PacketRing, "push", counted)
+    network = BenchmarkNetwork(load(), range(50))
+    for _ in range(200):
+        network.step()
+    assert network.packets == len(pushes)
+
+
+def test_benchmark_runs_the_requested_volume():
+    output = io.StringIO()
+    with open("day23.txt") as file, redirect_stdout(output):
+        benchmark(file, nodes=10, packets=500)
+    rows = dict(line.split(": ", 1) for line in output.getvalue().splitlines())
+    assert int(rows["Packets"].split()[0]) >= 500
+    assert int(rows["Rounds"].split()[0]) > 1
+
+
+def test_nic_blocks_after_idle_polls():
+    # Reads its address, then polls for input forever.
+    program = [3, 100, 3, 101, 1105, 1, 2]
+    wakes = []
+    buffers = {}
+    nic = NetworkComputer(7, program, buffers, wakes.append)
+    assert nic.run() is Status.BLOCKED
+    assert nic.idle() and nic.waiting()
+    polls = nic.counter()
+
+    nic.net_buffer(7).push(1, 2)
+    assert not nic.waiting()
+    assert nic.run() is Status.BLOCKED
+    assert nic.waiting()
+    assert nic.counter() - polls == 2 * (NetworkComputer.IdlePolls + 2)
+
+
+def test_network_settles_when_every_nic_is_idle():
+    network = Network(load(), range(50))
+    network.run()
+    assert not network.step()
+    assert all(nic.waiting() for nic in network._computers.values())
+    assert network.buffer(255)
+
+    x, y = network.buffer(255).pop()
+    network.send(0, x, y)
+    assert network.step()
+
+
+def answer(part, **options):
+    output = io.StringIO()
+    with open("day23.txt") as file, redirect_stdout(output):
+        part(file, **options)
+    return output.getvalue().strip()
+
+
+def test_scheduler_finds_both_answers():
+    assert answer(part1) == "Answer: 23626"
+    assert answer(part2) == "Answer: 19019"
+
+
+def test_scheduler_runs_only_woken_nics():
+    network = Network(load(), range(50))
+    network.run()
+    network.send(3, 1, 2)
+    network.send(3, 3, 4)
+    assert [nic.addr() for nic in network._ready] == [3]
+    assert network.step()
+    assert all(nic.addr() != 3 for nic in network._ready)
+
+
+def test_sharded_network_matches_single_process():
+    for shards in (2, 3):
+        assert answer(part1, shards=shards) == "Answer: 23626"
+        assert answer(part2, shards=shards) == "Answer: 19019"
+
+
+def test_sharded_network_reports_worker_errors():
+    # Reads its address, then hits an invalid opcode.
+    network = ShardedNetwork([3, 100, 42], range(4), 2)
+    try:
+        network.step()
+    except ValueError as e:
+        assert "42" in str(e)
+    else:
+        raise AssertionError("worker error was not raised")
+    finally:
+        network.close()
+
+
+def test_packet_ring_wraps_and_grows():
+    ring = PacketRing(4)
+    ring.push(1, 2)
+    assert ring.popleft() == (1, 2)
+    for n in range(10):
+        ring.push(n, -n)
+    assert len(ring) == 10
+    assert list(ring) == [(n, -n) for n in range(10)]
+    assert ring.pop() == (9, -9)
+    assert ring.popleft() == (0, 0)
+    assert len(ring) == 8
+    ring.clear()
+    assert not ring
+
+
+def test_shared_packet_ring_is_visible_across_handles():
+    ring = SharedPacketRing(8)
+    try:
+        other = pickle.loads(pickle.dumps(ring))
+        packets = [(1, 10, 20), (2, 30, 40), (3, 50, 60)]
+        count, spilled = pack_packets(ring, packets)
+        assert (count, spilled) == (2, [(3, 50, 60)])
+        assert list(unpack_packets(other, (count, spilled))) == packets
+        assert ring.free() == 8
+        ring.write(1)
+        other.close()
+        for value in range(7):
+            ring.write(value)
+        try:
+            ring.write(8)
+        except BufferError:
+            pass
+        else:
+            raise AssertionError("wrote past the end of a shared ring")
+    finally:
+        ring.close()
+
+
+def test_shared_rings_find_both_answers():
+    assert answer(part1, shards=2, shared=True) == "Answer: 23626"
+    assert answer(part2, shards=2, shared=True) == "Answer: 19019"
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import io
+import pytest
+from collections import deque
+from contextlib import redirect_stdout
+from computer import AddMulOps, Computer, Status
+from day7 import amplify, amplify_feedback, make_queue_input
+
+
+def answer(module, part, filename):
+    output = io.StringIO()
+    with open(filename) as file, redirect_stdout(output):
+        module.main(part, file)
+    return output.getvalue().splitlines()[-1]
+
+
+def test_instruction_set_rejects_other_opcodes():
+    computer = Computer([1, 0, 0, 0, 3, 0, 99], instruction_set=AddMulOps)
+    with pytest.raises(ValueError):
+        computer.run()
+    assert computer.get(0) == 2
+
+
+def test_input_errors_block_instead_of_raising():
+    queue = deque()
+    outputs = []
+    computer = Computer([3, 9, 4, 9, 99], make_queue_input(queue),
+                        outputs.append, input_errors=(IndexError,))
+    assert computer.run() is Status.BLOCKED
+    queue.append(42)
+    assert computer.run() is Status.HALTED
+    assert outputs == [42]
+
+
+def test_day7_examples():
+    program = [3, 15, 3, 16, 1002, 16, 10, 16, 1, 16, 15, 15, 4, 15, 99, 0, 0]
+    assert amplify(program, (4, 3, 2, 1, 0)) == 43210
+
+    program = [3, 26, 1001, 26, -4, 26, 3, 27, 1002, 27, 2, 27, 1, 27, 26,
+               27, 4, 27, 1001, 28, -1, 28, 1005, 28, 6, 99, 0, 0, 5]
+    assert amplify_feedback(program, (9, 8, 7, 6, 5)) == 139629729
+
+
+@pytest.mark.parametrize("day, part, expected", [
+    ("day2", 1, "3101878"),
+    ("day2", 2, "Answer: 8444"),
+    ("day7", 1, "Answer: 38500"),
+    ("day7", 2, "Answer: 33660560"),
+    ("day11", 1, "Answer: 1985"),
+])
+def test_day_answers(day, part, expected):
+    module = __import__(day)
+    assert answer(module, part, f"{day}.txt") == expected
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import random
+import re
+from display import FrameBuffer
+
+
+class Terminal(object):
+    Escape = re.compile(r"\x1b\[(?:(\d+);(\d+)H|2J|H|K)|\n|[^\x1b\n]")
+
+    def __init__(self):
+        self.cells = {}
+        self.row = self.col = 1
+
+    def write(self, output):
+        for match in Terminal.Escape.finditer(output):
+            token = match.group()
+            if token == "\x1b[2J":
+                self.cells.clear()
+            elif token == "\x1b[H":
+                self.row = self.col = 1
+            elif token == "\x1b[K":
+                for key in [key for key in self.cells
+                            if key[0] == self.row and key[1] >= self.col]:
+                    del self.cells[key]
+            elif match.group(1):
+                self.row, self.col = int(match.group(1)), int(match.group(2))
+            elif token == "\n":
+                self.row, self.col = self.row + 1, 1
+            else:
+                self.cells[self.row, self.col] = token
+                self.col += 1
+
+    def lines(self):
+        rows = [[] for _ in range(max(row for row, _ in self.cells))]
+        for (row, col), char in sorted(self.cells.items()):
+            line = rows[row - 1]
+            line.extend(' ' * (col - 1 - len(line)))
+            line.append(char)
+        return [''.join(line).rstrip() for line in rows]
+
+
+def screen(frame, status):
+    return [line.rstrip() for line in (frame.text() + '\n' + status)
+            .splitlines()]
+
+
+def test_unchanged_frame_renders_nothing():
+    frame = FrameBuffer()
+    frame.set(0, 0, '#')
+    assert frame.render().startswith("\x1b[2J\x1b[H")
+    assert frame.render() == ''
+    frame.set(0, 0, '#')
+    assert frame.render() == ''
+
+
+def test_changed_cells_are_drawn_in_runs():
+    frame = FrameBuffer(border=False)
+    frame.set(0, 0, '.')
+    frame.set(5, 3, '.')
+    frame.render()
+    frame.set(1, 2, 'a')
+    frame.set(2, 2, 'b')
+    frame.set(4, 1, 'c')
+    assert frame.render() == "\x1b[2;5Hc\x1b[3;2Hab\x1b[6;1H"
+
+
+def test_status_line_updates_alone():
+    frame = FrameBuffer()
+    frame.set(0, 0, '#')
+    frame.render()
+    frame.status("Score: 1")
+    assert frame.render() == "\x1b[4;1HScore: 1\x1b[K\x1b[5;1H"
+
+
+def test_growing_bounds_redraws_everything():
+    frame = FrameBuffer()
+    frame.set(0, 0, '#')
+    frame.render()
+    frame.set(-1, 0, '#')
+    assert frame.render().startswith("\x1b[2J\x1b[H")
+
+
+def test_diffs_reproduce_full_frame():
+    rng = random.Random(2019)
+    for border in (True, False):
+        frame = FrameBuffer(border=border)
+        terminal = Terminal()
+        status = ''
+        for _ in range(200):
+            for _ in range(rng.randrange(1, 8)):
+                frame.set(rng.randrange(-3, 12), rng.randrange(-2, 6),
+                          rng.choice(' #.o'))
+            if rng.random() < 0.2:
+                status = f"Score: {rng.randrange(1000)}"
+                frame.status(status)
+            terminal.write(frame.render())
+            assert terminal.lines() == screen(frame, status)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import random
+from grid import Grid
+
+
+def test_reads_outside_do_not_grow():
+    grid = Grid(2)
+    assert grid.get(-100, 100) == 2
+    assert grid.bounds() is None
+    assert grid.count(2) == 0
+    assert len(grid._cells) == 0
+
+
+def test_growth_keeps_cells():
+    grid = Grid()
+    grid.set(0, 0, 1)
+    grid.set(-20, 3, 2)
+    grid.set(30, -15, 3)
+    assert (grid.get(0, 0), grid.get(-20, 3), grid.get(30, -15)) == (1, 2, 3)
+    assert grid.bounds() == ((-20, -15), (30, 3))
+    assert grid.count(0) == 51 * 19 - 3
+
+
+def test_include_extends_bounds_only():
+    grid = Grid(2)
+    grid.set(0, 0, 1)
+    grid.include(3, -1)
+    assert grid.get(3, -1) == 2
+    assert grid.bounds() == ((0, -1), (3, 0))
+    assert grid.count(1) == 1
+    assert grid.count(2) == 7
+
+
+def test_matches_dictionary():
+    rng = random.Random(2019)
+    for default in (0, 2):
+        grid = Grid(default)
+        cells = {}
+        for _ in range(1000):
+            x, y = rng.randrange(-40, 40), rng.randrange(-30, 30)
+            if rng.random() < 0.1:
+                grid.include(x, y)
+                cells.setdefault((x, y), default)
+            else:
+                value = rng.randrange(4)
+                grid.set(x, y, value)
+                cells[x, y] = value
+
+            xs = [x for x, _ in cells]
+            ys = [y for _, y in cells]
+            assert grid.bounds() == ((min(xs), min(ys)), (max(xs), max(ys)))
+            area = (max(xs) - min(xs) + 1) * (max(ys) - min(ys) + 1)
+            for value in range(4):
+                expected = sum(1 for v in cells.values() if v == value)
+                if value == default:
+                    expected += area - len(cells)
+                assert grid.count(value) == expected
+        for (x, y), value in cells.items():
+            assert grid.get(x, y) == value
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+from computer import Computer, Memory, PagedMemory
+
+
+def test_memory_grows_geometrically():
+    memory = Memory([1, 2, 3])
+    memory.set(10, 5)
+    memory.set(11, 6)
+    assert len(memory) == 12
+    capacity = len(memory._cells)
+    assert capacity >= 2 * 11
+    memory.set(capacity - 1, 7)
+    assert len(memory._cells) == capacity
+    assert memory.data()[:12] == [1, 2, 3] + [0] * 7 + [5, 6]
+
+
+def test_reads_past_the_end_extend_memory():
+    for kind in (Memory, PagedMemory):
+        memory = kind([1, 2, 3])
+        assert memory.get(5000) == 0
+        assert len(memory) == 5001
+        assert memory.data()[:3] == [1, 2, 3]
+
+
+def test_paged_memory_matches_dense():
+    dense = Memory(list(range(3000)))
+    paged = PagedMemory(list(range(3000)))
+    for index, value in ((5, -1), (2047, 9), (70000, 4), (1024, 3)):
+        dense.set(index, value)
+        paged.set(index, value)
+    assert paged.data() == dense.data()
+    assert paged.get(69999) == dense.get(69999) == 0
+
+
+def test_paged_memory_skips_untouched_pages():
+    memory = PagedMemory([1])
+    memory.set(1 << 30, 2)
+    assert memory.pages() == 2
+    assert memory.get(1 << 30) == 2
+
+
+def test_copies_are_independent():
+    for kind in (Memory, PagedMemory):
+        original = kind([1, 2, 3])
+        copy = original.copy()
+        copy.set(0, 9)
+        original.set(1, 8)
+        assert original.data() == [1, 8, 3]
+        assert copy.data() == [9, 2, 3]
+
+
+def test_day9_runs_on_both_memories():
+    with open("day9.txt") as file:
+        program = [int(value, 10) for value in file.readline().split(',')]
+    results = []
+    for kind in (Memory, PagedMemory):
+        outputs = []
+        computer = Computer(program, lambda: 1, outputs.append, memory=kind)
+        computer.run()
+        results.append(outputs)
+    assert results[0] == results[1] and len(results[0]) == 1